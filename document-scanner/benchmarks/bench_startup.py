@@ -0,0 +1,121 @@
+"""Benchmark für die Startzeit (python -X importtime).
+
+Misst die kumulierte Importzeit der Einstiegsmodule im aktuellen Stand und
+optional in einer früheren Git-Revision (vorher/nachher):
+
+    python benchmarks/bench_startup.py [--baseline REV] [--runs 3]
+
+Fehlende Abhängigkeiten werden mit ausgegeben; die Zeit bis zum Fehler zählt trotzdem.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ["main", "scanner.document_processor", "scan_file"]
+HEAVY = ("torch", "transformers", "PyQt5", "pytesseract", "pdf2image", "watchdog", "numpy", "PIL", "pyarrow")
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(src_dir, module):
+    """Führt einen Import mit -X importtime aus; liefert (ms, Module, schwere Pakete, Fehler)."""
+    if not os.path.exists(os.path.join(src_dir, *module.split(".")) + ".py"):
+        return None
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=src_dir, capture_output=True, text=True,
+    )
+    total_us, modules, heavy = 0, 0, {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        modules += 1
+        if indent == 1:
+            total_us += cumulative
+        top = name.split(".")[0]
+        if top in HEAVY and (name == top or top not in heavy):
+            heavy[top] = max(heavy.get(top, 0), cumulative)
+    error = None
+    if result.returncode != 0:
+        error = (result.stderr.strip().splitlines() or ["?"])[-1]
+    return total_us / 1000.0, modules, heavy, error
+
+
+def best_of(src_dir, module, runs):
+    results = [measure(src_dir, module) for _ in range(runs)]
+    if results[0] is None:
+        return None
+    return min(results, key=lambda r: r[0])
+
+
+def export_revision(revision, destination):
+    """Schreibt den src-Ordner einer Git-Revision nach `destination`."""
+    repo = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=ROOT,
+                          capture_output=True, text=True, check=True).stdout.strip()
+    prefix = os.path.relpath(os.path.join(ROOT, "src"), repo)
+    archive = os.path.join(destination, "src.tar")
+    subprocess.run(["git", "archive", "-o", archive, revision, prefix], cwd=repo, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(destination)
+    return os.path.join(destination, prefix)
+
+
+def report(label, src_dir, runs):
+    print(f"\n[{label}] {src_dir}")
+    rows = {}
+    for module in TARGETS:
+        result = best_of(src_dir, module, runs)
+        rows[module] = result
+        if result is None:
+            print(f"  {module:<28} nicht vorhanden")
+            continue
+        total_ms, modules, heavy, error = result
+        heavy_text = ", ".join(f"{name} {us / 1000.0:.0f} ms" for name, us in sorted(heavy.items(), key=lambda i: -i[1]))
+        print(f"  {module:<28} {total_ms:8.1f} ms  {modules:4d} Module  {heavy_text or '-'}")
+        if error:
+            print(f"  {'':<28} abgebrochen: {error}")
+    return rows
+
+
+def daemon_roundtrip(runs):
+    sys.path.insert(0, os.path.join(ROOT, "src"))
+    from worker.client import WorkerClient
+    client = WorkerClient()
+    if not client.available():
+        print("\nWorker-Daemon nicht aktiv (python -m worker.daemon), Round-Trip übersprungen")
+        return
+    timings = []
+    for _ in range(max(runs, 5)):
+        start = time.perf_counter()
+        client.request("ping")
+        timings.append((time.perf_counter() - start) * 1000.0)
+    print(f"\nWorker-Daemon Round-Trip (ping): {min(timings):.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", help="Git-Revision für den Vorher-Wert, z.B. HEAD~1")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    after = report("nachher", os.path.join(ROOT, "src"), args.runs)
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tmp:
+            before = report(f"vorher ({args.baseline})", export_revision(args.baseline, tmp), args.runs)
+        print("\nDifferenz (* = Import abgebrochen, Wert unvollständig):")
+        for module in TARGETS:
+            if before.get(module) and after.get(module):
+                marks = ["*" if result[3] else " " for result in (before[module], after[module])]
+                print(f"  {module:<28} {before[module][0]:8.1f} ms{marks[0]} -> {after[module][0]:8.1f} ms{marks[1]}")
+    daemon_roundtrip(args.runs)
+
+
+if __name__ == "__main__":
+    main()
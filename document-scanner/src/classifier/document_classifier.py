@@ -1,46 +1,80 @@
 import logging
 import re
+import threading
 from datetime import datetime
-from transformers import pipeline
 import json
+from classifier.learned_classifier import LearnedClassifier
+from classifier.field_extractor import FieldExtractor, format_amount
+from config.settings import CATEGORIES, LEARNED_MIN_CONFIDENCE
+
+SENDERS = ["Telekom", "Vodafone", "1&1", "O2", "E.ON", "RWE", "EnBW", "EWE", "Stadtwerke", "Amazon", "eBay", "PayPal", "Apple", "Google", "Microsoft", "Facebook", "Twitter", "Instagram", "WhatsApp", "Signal", "Telegram", "Threema", "Postbank", "Commerzbank", "Deutsche Bank", "ING", "Sparkasse", "Volksbank", "DKB", "N26", "Revolut", "Fidor", "HypoVereinsbank", "Consorsbank", "Deutsche Kreditbank", "Deutsche Bahn", "Lufthansa", "Airbus", "BMW", "Mercedes", "Volkswagen", "Audi", "Porsche", "Opel", "Ford", "Renault", "Peugeot", "Citroën", "Fiat", "Toyota", "Nissan", "Honda", "Mazda", "Subaru", "Mitsubishi", "Bundesagentur für Arbeit", "Jobcenters", "Arbeitsamt", "Finanzamt", "Stadtverwaltung", "Polizei", "Feuerwehr", "Rotes Kreuz", "Malteser", "Johanniter", "DRK", "THW", "ADAC", "Allianz", "HUK-Coburg", "DEVK", "AOK", "Barmer"]
+_SENDER_NAMES = {sender.lower(): sender for sender in SENDERS}
+# Longest names first, so "Deutsche Kreditbank" is not matched as a shorter name at the same position
+_SENDER_PATTERN = re.compile(
+    r'(?<!\w)(?:' + '|'.join(re.escape(s) for s in sorted(SENDERS, key=len, reverse=True)) + r')(?!\w)',
+    re.IGNORECASE)
 
 class DocumentClassifier:
     def __init__(self):
         try:
-            self.categories = ["Rechnungen", "Verträge", "Bescheinigungen", "Sonstiges"]
+            self.categories = list(CATEGORIES)
             
-            # Load pre-trained BART model for zero-shot classification
-            self.nlp = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+            # Pre-trained BART model for zero-shot classification, loaded on first use
+            self._nlp = None
+            self._nlp_lock = threading.Lock()
+
+            # Fast local model trained from user corrections
+            self.learned = LearnedClassifier()
+            self.field_extractor = FieldExtractor()
         except Exception as e:
             logging.error(f"Fehler beim Initialisieren des Dokumentenklassifizierers: {str(e)}")
             raise
 
-    def classify(self, text):
+    @property
+    def nlp(self):
+        """Lädt transformers/torch und das BART-Modell erst bei der ersten Verwendung."""
+        if self._nlp is None:
+            with self._nlp_lock:
+                if self._nlp is None:
+                    from transformers import pipeline
+                    self._nlp = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+        return self._nlp
+
+    def _classify_zero_shot(self, text):
+        """Klassifiziert mit dem Transformer-Modell; None bei Fehlern."""
         try:
-            text = text.lower()
-            
             # Define candidate labels for classification
             candidate_labels = self.categories
             
             # Use the model to classify the text
             result = self.nlp(text, candidate_labels)
-            category = result['labels'][0]
-            
-            suggested_filename = self.generate_filename(text, category)
-
-            return category, suggested_filename
+            return result['labels'][0]
                 
         except Exception as e:
-            logging.error(f"Klassifizierung fehlgeschlagen: {str(e)}")
-            return "Sonstiges", None
+            logging.error(f"Zero-Shot-Klassifizierung fehlgeschlagen: {str(e)}")
+            return None
 
-    def detect_sender(self, text):
+    def learn(self, text, category):
+        """Trainiert den lokalen Klassifikator mit einer bestätigten Kategorie."""
+        try:
+            self.learned.learn(text.lower(), category)
+        except Exception as e:
+            logging.error(f"Fehler beim Lernen der Kategorie: {str(e)}")
+
+    def detect_sender(self, text, use_model=False):
+        """Absender aus der Liste bekannter Absender; der früheste Treffer (Briefkopf) gewinnt.
+
+        Nur mit `use_model` (Kategorie war schon unsicher) wird bei fehlendem
+        Treffer das Transformer-Modell gefragt.
+        """
+        match = _SENDER_PATTERN.search(text)
+        if match:
+            return _SENDER_NAMES[match.group(0).lower()]
+        if not use_model:
+            return "Unbekannt"
         try:
-            # Define candidate labels for sender detection
-            candidate_labels = ["Telekom", "Vodafone", "1&1", "O2", "E.ON", "RWE", "EnBW", "EWE", "Stadtwerke", "Amazon", "eBay", "PayPal", "Apple", "Google", "Microsoft", "Facebook", "Twitter", "Instagram", "WhatsApp", "Signal", "Telegram", "Threema", "Postbank", "Commerzbank", "Deutsche Bank", "ING", "Sparkasse", "Volksbank", "DKB", "N26", "Revolut", "Fidor", "HypoVereinsbank", "Consorsbank", "Deutsche Kreditbank", "Deutsche Bahn", "Lufthansa", "Airbus", "BMW", "Mercedes", "Volkswagen", "Audi", "Porsche", "Opel", "Ford", "Renault", "Peugeot", "Citroën", "Fiat", "Toyota", "Nissan", "Honda", "Mazda", "Subaru", "Mitsubishi", "Bundesagentur für Arbeit", "Jobcenters", "Arbeitsamt", "Finanzamt", "Stadtverwaltung", "Polizei", "Feuerwehr", "Rotes Kreuz", "Malteser", "Johanniter", "DRK", "THW", "ADAC", "Allianz", "HUK-Coburg", "DEVK", "AOK", "Barmer"]
-            
             # Use the model to detect the sender
-            result = self.nlp(text, candidate_labels)
+            result = self.nlp(text, SENDERS)
             sender = result['labels'][0]
             
             return sender
@@ -48,65 +82,36 @@ class DocumentClassifier:
             logging.error(f"Fehler bei der Sendererkennung: {str(e)}")
             return "Unbekannt"
     
-    def detect_date(self, text):
-        """Versucht ein Datum im Text zu finden."""
-        date_patterns = [
-            r'\d{2}\.\d{2}\.\d{4}',  # DD.MM.YYYY
-            r'\d{2}/\d{2}/\d{4}',    # DD/MM/YYYY
-            r'\d{2}-\d{2}-\d{4}',    # DD-MM-YYYY
-            r'\d{1,2}\.\s?\d{1,2}\.\s?\d{4}',  # D.M.YYYY or DD. MM. YYYY
-            r'\d{1,2}\.\s?\d{1,2}\.\s?\d{2}',  # DD.MM.YY
-            r'\d{4}-\d{2}-\d{2}'     # YYYY-MM-DD (ISO format)
-        ]
+    def extract_fields(self, text):
+        """Findet Datum, Betrag, IBAN, Rechnungs- und Kundennummer in einem Durchlauf."""
+        return self.field_extractor.extract(text)
 
-        for pattern in date_patterns:
-            matches = re.finditer(pattern, text)
-            dates = [match.group(0) for match in matches]
-            if dates:
-                return self._normalize_date(dates[0])
-            
-        return datetime.now().strftime("%d.%m.%Y")
+    def detect_date(self, text, fields=None):
+        """Liefert das am besten bewertete Datum im Text."""
+        if fields is None:
+            fields = self.extract_fields(text)
+        return fields.value('date') or datetime.now().strftime("%d.%m.%Y")
     
-    def detect_amount(self, text):
-        """Erkennt Beträge im Text."""
-        # Verschiedene Betragsmuster (z.B. 1.234,56 € oder EUR 1.234,56)
-        amount_patterns = [
-            r'(\d+[.,]\d{2})\s*[€€EUR]',
-            r'[€€EUR]\s*(\d+[.,]\d{2})',
-            r'(\d+[.,]\d{2})\s*Euro',
-            r'Euro\s*(\d+[.,]\d{2})',
-        ]
-        
-        for pattern in amount_patterns:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(1)
-        return None
-
-    
-    def _normalize_date(self, date_str):
-        """Konvertiert verschiedene Datumsformate in DD.MM.YYYY"""
-
-        try:
-            date_str = date_str.replace("/", "")
+    def detect_amount(self, text, fields=None):
+        """Liefert den am besten bewerteten Betrag (z.B. Gesamtbetrag) als '1234,56'."""
+        if fields is None:
+            fields = self.extract_fields(text)
+        amount = fields.value('amount')
+        return format_amount(amount) if amount is not None else None
 
-            for fmt in ("%d.%m.%Y", "%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d.%m.%y"):
-                try:
-                    return datetime.strptime(date_str, fmt).strftime("%d.%m.%Y")
-                except ValueError:
-                    continue
-                return date_str
-        except Exception as e:
-            logging.error(f"Fehler beim Normalisieren des Datums: {str(e)}")
-            return datetime.now().strftime("%d.%m.%Y")
     
-    def generate_filename(self, text, category):
-        """Generates a filename based on sender, date, amount and category."""
+    def generate_filename(self, text, category, fields=None, use_model=False):
+        """Generates a filename based on sender, date, amount, invoice number and category."""
         try:
-            sender = self.detect_sender(text)
-            date = self.detect_date(text)
+            if fields is None:
+                fields = self.extract_fields(text)
+            sender = self.detect_sender(text, use_model)
+            date = self.detect_date(text, fields)
             doc_type = self.detect_document_type(text)
-            amount = self.detect_amount(text)
+            amount = self.detect_amount(text, fields)
+            invoice_number = fields.value('invoice_number')
+            fields.set('sender', sender)
+            fields.set('document_type', doc_type)
             
             # Remove invalid characters
             safe_sender = re.sub(r'[<>:"/\\|?*]', '', sender)
@@ -117,6 +122,9 @@ class DocumentClassifier:
             if amount:
                 components.append(f"{amount}EUR")
             
+            if invoice_number:
+                components.append("Nr " + re.sub(r'[<>:"/\\|?*]', '-', invoice_number))
+            
             if doc_type != "Sonstiges":
                 components.append(doc_type)
                 
@@ -163,25 +171,35 @@ class DocumentClassifier:
         
         return "Sonstiges"
     
-    def classify(self, text):
+    def _classify_keywords(self, text):
+        # Enhanced keyword lists for better classification
+        rechnung_keywords = ['rechnung', 'betrag', 'zahlung', 'euro', '€', 'summe', 'preis']
+        vertrag_keywords = ['vertrag', 'vereinbarung', 'bedingungen', 'laufzeit', 'kündigung']
+        bescheinigung_keywords = ['bescheinigung', 'bestätigung', 'nachweis', 'zertifikat']
+        
+        if any(word in text for word in rechnung_keywords):
+            return "Rechnungen"
+        elif any(word in text for word in vertrag_keywords):
+            return "Verträge"
+        elif any(word in text for word in bescheinigung_keywords):
+            return "Bescheinigungen"
+        return "Sonstiges"
+
+    def classify(self, text, fields=None):
         try:
+            if fields is None:
+                fields = self.extract_fields(text)
             text = text.lower()
             
-            # Enhanced keyword lists for better classification
-            rechnung_keywords = ['rechnung', 'betrag', 'zahlung', 'euro', '€', 'summe', 'preis']
-            vertrag_keywords = ['vertrag', 'vereinbarung', 'bedingungen', 'laufzeit', 'kündigung']
-            bescheinigung_keywords = ['bescheinigung', 'bestätigung', 'nachweis', 'zertifikat']
-            
-            if any(word in text for word in rechnung_keywords):
-                category = "Rechnungen"
-            elif any(word in text for word in vertrag_keywords):
-                category = "Verträge"
-            elif any(word in text for word in bescheinigung_keywords):
-                category = "Bescheinigungen"
+            # Only escalate to the transformer when the learned model is unsure
+            category, confidence = self.learned.predict(text)
+            escalated = category is None or confidence < LEARNED_MIN_CONFIDENCE
+            if escalated:
+                category = self._classify_zero_shot(text) or self._classify_keywords(text)
             else:
-                category = "Sonstiges"
+                logging.info(f"Gelernte Klassifizierung: {category} ({confidence:.2f})")
             
-            suggested_filename = self.generate_filename(text, category)
+            suggested_filename = self.generate_filename(text, category, fields, use_model=escalated)
 
             return category, suggested_filename
                 
@@ -0,0 +1,215 @@
+import re
+from datetime import datetime, timedelta
+
+MONTHS = {
+    'januar': 1, 'jan': 1, 'februar': 2, 'feb': 2, 'märz': 3, 'maerz': 3, 'mär': 3, 'april': 4, 'apr': 4,
+    'mai': 5, 'juni': 6, 'jun': 6, 'juli': 7, 'jul': 7, 'august': 8, 'aug': 8, 'september': 9, 'sep': 9,
+    'sept': 9, 'oktober': 10, 'okt': 10, 'november': 11, 'nov': 11, 'dezember': 12, 'dez': 12,
+}
+
+# Context keywords and how strongly they vote for a candidate of the given kind
+KEYWORDS = {
+    'gesamtbetrag': ('amount', 3.0), 'rechnungsbetrag': ('amount', 3.0), 'endbetrag': ('amount', 3.0),
+    'gesamtsumme': ('amount', 3.0), 'zu zahlen': ('amount', 3.0), 'zahlbetrag': ('amount', 3.0),
+    'summe': ('amount', 2.0), 'brutto': ('amount', 2.0), 'total': ('amount', 2.0), 'betrag': ('amount', 1.5),
+    'netto': ('amount', -1.0), 'mwst': ('amount', -1.5), 'ust': ('amount', -1.5), 'rabatt': ('amount', -1.0),
+    'rechnungsdatum': ('date', 3.0), 'belegdatum': ('date', 3.0), 'datum': ('date', 2.0),
+    'ausgestellt': ('date', 1.5), 'leistungsdatum': ('date', 1.0), 'lieferdatum': ('date', 0.5),
+    'fällig': ('date', -0.5), 'zahlbar bis': ('date', -0.5), 'geburtsdatum': ('date', -2.0),
+    'iban': ('iban', 2.0), 'empfänger': ('iban', 1.0), 'kontoinhaber': ('iban', 1.0),
+}
+KEYWORD_WINDOW = 80
+
+_MONTH_NAMES = '|'.join(sorted(MONTHS, key=len, reverse=True))
+_KEYWORDS = '|'.join(re.escape(k) for k in sorted(KEYWORDS, key=len, reverse=True))
+# Invoice/customer numbers: case-sensitive and with at least one digit, so words
+# after a label ("Rechnungsnummer bei Zahlung angeben") are not taken as numbers
+_ID = r'(?-i:(?=[A-Z\-/]*\d)[A-Z0-9][A-Z0-9\-/]{2,24})\b'
+
+# One alternation scanned once with finditer; earlier branches win at the same
+# position, so dates are tried before amounts ("12.03.2024" is not "12.03").
+# Thousands groups use one separator throughout, including a plain space ("1 234,56"),
+# and an amount never starts inside another number ("1.234 567,89" is not 234567.89).
+FIELD_PATTERN = re.compile(
+    r'(?P<invoice_label>rechnungs?-?\s?(?:nummer|nr\.?)|rechnung\s+nr\.?|invoice\s+(?:no\.?|number))\s*[:#]?\s*(?P<invoice>' + _ID + r')'
+    + r'|(?P<customer_label>kunden-?\s?(?:nummer|nr\.?)|kd\.?-?\s?nr\.?)\s*[:#]?\s*(?P<customer>' + _ID + r')'
+    + r'|(?P<keyword>\b(?:' + _KEYWORDS + r'))'
+    + r'|(?P<iban>\b[A-Z]{2}\d{2}(?:\s?[A-Z0-9]{4}){3,7}(?:\s?[A-Z0-9]{1,3})?\b)'
+    + r'|(?P<date_iso>\b\d{4}-\d{2}-\d{2}\b)'
+    + r'|(?P<date_num>\b\d{1,2}[./-]\s?\d{1,2}[./-]\s?(?:\d{4}|\d{2})\b)'
+    + r'|(?P<date_text>\b\d{1,2}\.?\s(?:' + _MONTH_NAMES + r')\.?\s\d{4}\b)'
+    + r'|(?P<amount>(?P<cur_pre>(?:€|eur)\s?)?-?(?<![\d.,\'])\b(?:\d{1,3}(?P<group>[.,\'\u00a0\u202f ])\d{3}(?:(?P=group)\d{3})*|\d+)(?:[.,]\d{2})\b(?P<cur_post>\s?(?:€|eur(?:o)?\b))?)',
+    re.IGNORECASE,
+)
+
+
+class Candidate:
+    """Ein gefundener Wert mit Position, Kontext und Bewertung."""
+
+    __slots__ = ('kind', 'value', 'raw', 'start', 'end', 'score', 'context')
+
+    def __init__(self, kind, value, raw, start, end, score=0.0, context=''):
+        self.kind = kind
+        self.value = value
+        self.raw = raw
+        self.start = start
+        self.end = end
+        self.score = score
+        self.context = context
+
+    def __repr__(self):
+        return f"Candidate({self.kind}, {self.value!r}, score={self.score:.2f}, pos={self.start})"
+
+
+class ExtractedFields:
+    """Alle Kandidaten eines Textes plus die jeweils am besten bewerteten Werte."""
+
+    KINDS = ('date', 'amount', 'iban', 'invoice_number', 'customer_number')
+
+    def __init__(self, candidates):
+        self.candidates = candidates
+        self._extra = {}
+        self._best = {}
+        for candidate in candidates:
+            current = self._best.get(candidate.kind)
+            if current is None or candidate.score > current.score:
+                self._best[candidate.kind] = candidate
+
+    def best(self, kind):
+        return self._best.get(kind)
+
+    def value(self, kind, default=None):
+        if kind in self._extra:
+            return self._extra[kind]
+        candidate = self._best.get(kind)
+        return candidate.value if candidate is not None else default
+
+    def set(self, kind, value):
+        """Ergänzt einen anderweitig ermittelten Wert, z.B. den Absender."""
+        self._extra[kind] = value
+
+    def as_dict(self):
+        """Strukturierte Metadaten, z.B. für Dateinamen oder einen Suchindex."""
+        result = {kind: self.value(kind) for kind in self.KINDS}
+        result.update(self._extra)
+        return result
+
+
+class FieldExtractor:
+    """Findet Datum, Betrag, IBAN, Rechnungs- und Kundennummer in einem Durchlauf."""
+
+    def __init__(self, context_chars=40, today=None):
+        self.context_chars = context_chars
+        self.today = today
+
+    def extract(self, text):
+        candidates = []
+        last_keyword = {}  # kind -> (end position, weight) of the most recent keyword
+
+        for match in FIELD_PATTERN.finditer(text):
+            group = match.lastgroup
+            if group == 'keyword':
+                kind, weight = KEYWORDS[match.group('keyword').lower()]
+                last_keyword[kind] = (match.end(), weight)
+                continue
+
+            candidate = self._candidate(match, group)
+            if candidate is None:
+                continue
+
+            keyword = last_keyword.get(candidate.kind)
+            if keyword is not None:
+                distance = candidate.start - keyword[0]
+                if distance <= KEYWORD_WINDOW:
+                    candidate.score += keyword[1] * (1.0 - distance / (2.0 * KEYWORD_WINDOW))
+
+            start = max(0, candidate.start - self.context_chars)
+            candidate.context = text[start:candidate.end + self.context_chars]
+            candidates.append(candidate)
+
+        self._score_amounts(candidates)
+        return ExtractedFields(candidates)
+
+    def _candidate(self, match, group):
+        start, end = match.span()
+        if group == 'invoice':
+            return Candidate('invoice_number', match.group('invoice').upper(), match.group(0),
+                             match.start('invoice'), end, score=2.0)
+        if group == 'customer':
+            return Candidate('customer_number', match.group('customer').upper(), match.group(0),
+                             match.start('customer'), end, score=2.0)
+        if group == 'iban':
+            iban = re.sub(r'\s', '', match.group(0)).upper()
+            if not self._valid_iban(iban):
+                return None
+            return Candidate('iban', iban, match.group(0), start, end, score=1.0)
+        if group in ('date_iso', 'date_num', 'date_text'):
+            parsed = self._parse_date(match.group(0), group)
+            if parsed is None:
+                return None
+            score = 0.5 if group == 'date_text' else 0.0
+            today = self.today or datetime.now()
+            if parsed > today + timedelta(days=366) or parsed.year < 1950:
+                score -= 1.0
+            return Candidate('date', parsed.strftime("%d.%m.%Y"), match.group(0), start, end, score=score)
+        if group == 'amount':
+            value = self._parse_amount(match.group('amount'))
+            if value is None:
+                return None
+            has_currency = match.group('cur_pre') or match.group('cur_post')
+            return Candidate('amount', value, match.group(0), start, end, score=1.0 if has_currency else 0.0)
+        return None
+
+    @staticmethod
+    def _score_amounts(candidates):
+        # The grand total is usually the largest amount with a currency on the page
+        amounts = [c for c in candidates if c.kind == 'amount' and c.score > 0]
+        if amounts:
+            max(amounts, key=lambda c: c.value).score += 0.5
+
+    @staticmethod
+    def _valid_iban(iban):
+        if not 15 <= len(iban) <= 34:
+            return False
+        rearranged = iban[4:] + iban[:4]
+        digits = ''.join(str(int(ch, 36)) for ch in rearranged)
+        return int(digits) % 97 == 1
+
+    @staticmethod
+    def _parse_date(raw, group):
+        raw = re.sub(r'\s', '', raw) if group != 'date_text' else raw
+        if group == 'date_iso':
+            formats = ("%Y-%m-%d",)
+        elif group == 'date_num':
+            raw = raw.replace('/', '.').replace('-', '.')
+            formats = ("%d.%m.%Y", "%d.%m.%y")
+        else:
+            parts = raw.replace('.', ' ').split()
+            try:
+                return datetime(int(parts[2]), MONTHS[parts[1].lower()], int(parts[0]))
+            except (ValueError, KeyError, IndexError):
+                return None
+        for fmt in formats:
+            try:
+                return datetime.strptime(raw, fmt)
+            except ValueError:
+                continue
+        return None
+
+    @staticmethod
+    def _parse_amount(raw):
+        number = re.sub(r'(?i)€|eur(?:o)?|\s|\'', '', raw)
+        if not number:
+            return None
+        # Decimal separator is whichever of ',' or '.' comes last
+        decimal = max(number.rfind(','), number.rfind('.'))
+        integer_part = re.sub(r'[.,]', '', number[:decimal])
+        try:
+            return round(float(f"{integer_part}.{number[decimal + 1:]}"), 2)
+        except ValueError:
+            return None
+
+
+def format_amount(value):
+    """Formatiert einen Betrag im deutschen Format ohne Tausendertrennzeichen (1234,56)."""
+    return f"{value:.2f}".replace('.', ',')
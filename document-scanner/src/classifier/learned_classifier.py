@@ -0,0 +1,186 @@
+import logging
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from config.settings import LEARNED_MODEL_PATH, LEARNED_MIN_SAMPLES
+
+TOKEN_PATTERN = re.compile(r'\w{2,}')
+# Held-out predictions used to fit the softmax temperature; older ones count less
+# because they were made by a less trained model
+CALIBRATION_WINDOW = 200
+CALIBRATION_HALF_LIFE = 20
+TEMPERATURES = np.geomspace(0.02, 5.0, 80).astype(np.float32)
+# Corrections arriving within this many seconds are written to disk together
+SAVE_DELAY = 5.0
+
+
+class LearnedClassifier:
+    """Online-Klassifikator (Softmax-Regression über gehashte Wort-n-Gramme).
+
+    Lernt aus jeder Korrektur einzeln und liefert Vorhersagen mit
+    Wahrscheinlichkeit, ohne das Transformer-Modell zu laden.
+
+    Die Wahrscheinlichkeiten werden per Temperature Scaling kalibriert: jede
+    Korrektur wird vor dem Lernschritt vorhergesagt und ist damit eine
+    zurückgehaltene Stichprobe; die Temperatur minimiert die nach Aktualität
+    gewichtete Log-Loss über die letzten CALIBRATION_WINDOW dieser Vorhersagen.
+    """
+
+    def __init__(self, model_path=LEARNED_MODEL_PATH, n_features=2 ** 18, learning_rate=0.5):
+        self.model_path = model_path
+        self.n_features = n_features
+        self.learning_rate = learning_rate
+        self.labels = []
+        self.weights = np.zeros((n_features, 0), dtype=np.float32)
+        self.bias = np.zeros(0, dtype=np.float32)
+        self.n_samples = 0
+        self.temperature = 1.0
+        # Raw scores before each learning step (padded with -inf for labels added later) and the true label
+        self.held_out_scores = np.zeros((0, 0), dtype=np.float32)
+        self.held_out_labels = np.zeros(0, dtype=np.int64)
+        self._lock = threading.Lock()
+        self._save_timer = None
+        self._load()
+
+    def _features(self, text):
+        """Gehashte Uni- und Bigramme, log-skaliert und L2-normalisiert."""
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        if not grams:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        hashes = np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.int64, count=len(grams))
+        indices, counts = np.unique(hashes % self.n_features, return_counts=True)
+        values = np.log1p(counts).astype(np.float32)
+        values /= np.linalg.norm(values)
+        return indices, values
+
+    def _scores(self, indices, values):
+        return values @ self.weights[indices] + self.bias
+
+    @staticmethod
+    def _softmax(scores):
+        scores = scores - scores.max()
+        exp = np.exp(scores)
+        return exp / exp.sum()
+
+    def predict(self, text):
+        """Gibt (Kategorie, kalibrierte Konfidenz) zurück; (None, 0.0) solange zu wenig gelernt wurde."""
+        with self._lock:
+            if len(self.held_out_labels) < LEARNED_MIN_SAMPLES or len(self.labels) < 2:
+                return None, 0.0
+            indices, values = self._features(text)
+            if indices.size == 0:
+                return None, 0.0
+            probs = self._softmax(self._scores(indices, values) / self.temperature)
+            best = int(probs.argmax())
+            return self.labels[best], float(probs[best])
+
+    def learn(self, text, category):
+        """Ein SGD-Schritt auf dem Log-Loss für ein bestätigtes (Text, Kategorie)-Paar."""
+        indices, values = self._features(text)
+        with self._lock:
+            if category not in self.labels:
+                self.labels.append(category)
+                self.weights = np.hstack([self.weights, np.zeros((self.n_features, 1), dtype=np.float32)])
+                self.bias = np.append(self.bias, np.float32(0))
+                padding = np.full((len(self.held_out_labels), 1), -np.inf, dtype=np.float32)
+                self.held_out_scores = np.hstack([self.held_out_scores, padding])
+            elif len(self.labels) >= 2 and indices.size:
+                # Predicted before training on it, so this is an unbiased sample for calibration
+                self._hold_out(self._scores(indices, values), self.labels.index(category))
+            if indices.size == 0:
+                return
+
+            target = np.zeros(len(self.labels), dtype=np.float32)
+            target[self.labels.index(category)] = 1.0
+            gradient = self._softmax(self._scores(indices, values)) - target
+
+            self.weights[indices] -= self.learning_rate * np.outer(values, gradient)
+            self.bias -= self.learning_rate * gradient
+            self.n_samples += 1
+            self._schedule_save()
+
+    def _hold_out(self, scores, label):
+        self.held_out_scores = np.vstack([self.held_out_scores, scores[None, :]])[-CALIBRATION_WINDOW:]
+        self.held_out_labels = np.append(self.held_out_labels, label)[-CALIBRATION_WINDOW:]
+        self._calibrate()
+
+    def _calibrate(self):
+        """Temperatur mit minimaler Log-Loss auf den zurückgehaltenen Vorhersagen (Gittersuche)."""
+        scaled = self.held_out_scores[None, :, :] / TEMPERATURES[:, None, None]
+        scaled = scaled - scaled.max(axis=2, keepdims=True)
+        log_norm = np.log(np.exp(scaled).sum(axis=2))
+        rows = np.arange(len(self.held_out_labels))
+        age = rows[::-1]
+        recency = 0.5 ** (age / CALIBRATION_HALF_LIFE)
+        losses = (log_norm - scaled[:, rows, self.held_out_labels]) @ recency
+        self.temperature = float(TEMPERATURES[int(losses.argmin())])
+
+    def _schedule_save(self):
+        # Coalesce bursts of corrections into one write; the timer thread keeps the process alive until saved
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(SAVE_DELAY, self.flush)
+            self._save_timer.start()
+
+    def flush(self):
+        """Schreibt ausstehende Änderungen sofort."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+                self._save()
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+            tmp_path = self.model_path + ".tmp.npz"
+            # Only hashed features seen in training have non-zero weights
+            rows = np.flatnonzero(self.weights.any(axis=1))
+            np.savez(
+                tmp_path,
+                n_features=np.array(self.n_features),
+                rows=rows,
+                weights=self.weights[rows],
+                bias=self.bias,
+                labels=np.array(self.labels),
+                n_samples=np.array(self.n_samples),
+                temperature=np.array(self.temperature),
+                held_out_scores=self.held_out_scores,
+                held_out_labels=self.held_out_labels,
+            )
+            os.replace(tmp_path, self.model_path)
+        except Exception as e:
+            logging.error(f"Fehler beim Speichern des gelernten Klassifikators: {str(e)}")
+
+    def _load(self):
+        if not os.path.exists(self.model_path):
+            return
+        try:
+            with np.load(self.model_path) as data:
+                sparse = 'rows' in data.files
+                n_features = int(data['n_features']) if sparse else data['weights'].shape[0]
+                if n_features != self.n_features:
+                    logging.warning("Gespeicherter Klassifikator hat andere Feature-Größe, wird ignoriert")
+                    return
+                self.labels = [str(label) for label in data['labels']]
+                if sparse:
+                    self.weights = np.zeros((self.n_features, len(self.labels)), dtype=np.float32)
+                    self.weights[data['rows']] = data['weights']
+                else:
+                    # Dense, uncalibrated format of earlier versions: predictions resume after recalibration
+                    self.weights = data['weights'].astype(np.float32)
+                self.bias = data['bias'].astype(np.float32)
+                self.n_samples = int(data['n_samples'])
+                if 'temperature' in data.files:
+                    self.temperature = float(data['temperature'])
+                    self.held_out_scores = data['held_out_scores'].astype(np.float32)
+                    self.held_out_labels = data['held_out_labels'].astype(np.int64)
+                else:
+                    self.held_out_scores = np.zeros((0, len(self.labels)), dtype=np.float32)
+            logging.info(f"Gelernter Klassifikator geladen: {self.n_samples} Beispiele, {len(self.labels)} Kategorien")
+        except Exception as e:
+            logging.error(f"Fehler beim Laden des gelernten Klassifikators: {str(e)}")
@@ -6,5 +6,39 @@ WATCHED_FOLDER = os.path.expanduser("~/Library/Mobile Documents/com~apple~CloudD
 TESSERACT_OATH = '/opt/homebrew/bin/tesseract'
 OCR_LANGUAGE = "deu"
 
+# Pixel budget for OCR rasters (~A4 at 300 DPI); larger images are decoded at reduced resolution
+OCR_MAX_PIXELS = 9_000_000
+THUMBNAIL_SIZE = (400, 500)
+# Upper bound for decoded rasters kept in memory (shared by OCR, preview and hashing)
+DECODE_CACHE_MB = 64
+
+# Ablage-Kategorien (Ordner unter Sortierte_Dokumente); auch die Auswahl für Korrekturen in der GUI
+CATEGORIES = ["Rechnungen", "Verträge", "Bescheinigungen", "Sonstiges"]
+
 LOG_LEVEL = "INFO"
-LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
\ No newline at end of file
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Lokaler, inkrementell lernender Klassifikator; ab LEARNED_MIN_CONFIDENCE (kalibriert,
+# d.h. etwa die erwartete Trefferquote) wird das Transformer-Modell übersprungen
+LEARNED_MODEL_PATH = os.path.expanduser("~/Library/Application Support/DocumentScanner/learned_classifier.npz")
+LEARNED_MIN_CONFIDENCE = 0.8
+LEARNED_MIN_SAMPLES = 20
+
+# Metadaten verarbeiteter Dokumente (CSV-Partitionen je Monat)
+METADATA_DIR = os.path.expanduser("~/Library/Application Support/DocumentScanner/metadata")
+
+# Gleichzeitige Jobs je Klasse; interaktive Jobs verdrängen Stapelverarbeitung
+INTERACTIVE_CONCURRENCY = 2
+BULK_CONCURRENCY = 1
+# Neue Dateien gelten so lange nach "Dokument scannen" als interaktiv (Sekunden)
+INTERACTIVE_SCAN_WINDOW = 300
+
+# Optionaler Worker-Daemon, der OCR und Modelle geladen hält
+WORKER_SOCKET = os.path.expanduser("~/Library/Application Support/DocumentScanner/worker.sock")
+# Zeitlimit für Steuerbefehle (Vorziehen, Abbrechen, Lernen, Limits) in Sekunden
+WORKER_CONTROL_TIMEOUT = 5.0
+
+# Speicherbudget für die Verarbeitung (RSS); Jobs werden nur innerhalb des Budgets gestartet
+MEMORY_BUDGET_MB = 4096
+OCR_DPI = 200
+MIN_OCR_DPI = 150
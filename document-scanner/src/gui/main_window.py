@@ -1,15 +1,26 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                           QListWidget, QPushButton, QFileDialog, QComboBox)
-from PyQt5.QtCore import Qt
+                           QListWidget, QListWidgetItem, QPushButton, QFileDialog, QComboBox)
+from PyQt5.QtCore import Qt, pyqtSignal
 from .preview_panel import PreviewPanel
+from .settings_dialog import SettingsDialog
 from PyQt5.QtCore import QTimer
-from config.settings import WATCHED_FOLDER
+from config.settings import WATCHED_FOLDER, INTERACTIVE_SCAN_WINDOW, CATEGORIES
 import os
 import subprocess
+import time
 
 from datetime import datetime
 
+# Item data next to Qt.UserRole (current path): filed by the pipeline, correction waiting for that
+FILED_ROLE = Qt.UserRole + 1
+CORRECTION_ROLE = Qt.UserRole + 2
+
 class MainWindow(QMainWindow):
+    # Emitted from watchdog and pipeline threads; Qt delivers them on the GUI thread
+    status_changed = pyqtSignal(str)
+    document_detected = pyqtSignal(str)
+    document_filed = pyqtSignal(str, str)  # source path, target path
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Dokument Scanner")
@@ -19,10 +30,13 @@ class MainWindow(QMainWindow):
         self.sorting_timer.timeout.connect(self.process_pending_document)
         self.pending_document = None
         self.pending_category = None
+        self.pipeline = None  # set by main() for prioritizing, cancelling and learning corrections
+        self.interactive_until = 0  # new files before this time count as interactive scans
 
         # Initialize all UI elements as class attributes first
         self.status_label = QLabel("Warte auf neue Dokumente...")
         self.scan_button = QPushButton("Dokument scannen")
+        self.settings_button = QPushButton("Einstellungen")
         self.doc_list = QListWidget()
         self.category_label = QLabel("Kategorie:")
         self.category_combo = QComboBox()
@@ -31,6 +45,9 @@ class MainWindow(QMainWindow):
 
         # Then set up the UI
         self.setup_ui()
+        self.status_changed.connect(self.status_label.setText)
+        self.document_detected.connect(self.add_document)
+        self.document_filed.connect(self.on_document_filed)
 
     def setup_ui(self):
         # HauptWidget
@@ -42,6 +59,8 @@ class MainWindow(QMainWindow):
         top_layout = QHBoxLayout()
         self.scan_button.clicked.connect(self.start_scan)
         top_layout.addWidget(self.scan_button)
+        self.settings_button.clicked.connect(self.open_settings)
+        top_layout.addWidget(self.settings_button)
         top_layout.addWidget(self.status_label)
         layout.addLayout(top_layout)
 
@@ -62,7 +81,7 @@ class MainWindow(QMainWindow):
         
         # Kategorie Bereich
         category_layout = QHBoxLayout()
-        self.category_combo.addItems(["Rechnung", "Vertrag", "Mahnung", "Sonstiges"])
+        self.category_combo.addItems(CATEGORIES)
         self.save_category_btn.clicked.connect(self.save_category)
         
         category_layout.addWidget(self.category_label)
@@ -75,11 +94,35 @@ class MainWindow(QMainWindow):
         
         layout.addLayout(middle_layout)
 
+    def add_document(self, doc_path):
+        """Nimmt ein neu erkanntes Dokument in die Liste auf"""
+        self.status_label.setText(f"Verarbeite {os.path.basename(doc_path)}...")
+        item = QListWidgetItem(os.path.basename(doc_path))
+        item.setData(Qt.UserRole, doc_path)
+        self.doc_list.addItem(item)
+
+    def on_document_filed(self, source_path, target_path):
+        """Die Pipeline hat das Dokument abgelegt: Listeneintrag zeigt ab jetzt auf den Zielpfad"""
+        for row in range(self.doc_list.count()):
+            item = self.doc_list.item(row)
+            if item.data(Qt.UserRole) != source_path:
+                continue
+            item.setData(Qt.UserRole, target_path)
+            item.setData(FILED_ROLE, True)
+            category = item.data(CORRECTION_ROLE)
+            if category:
+                item.setData(CORRECTION_ROLE, None)
+                self.update_document_category(target_path, category, item)
+            return
+
     def on_document_selected(self, current, previous):
         """Wird aufgerufen, wenn ein Dokument in der Liste ausgewählt wird"""
         if current:
             doc_path = current.data(Qt.UserRole)
             print(f"Selected document path: {doc_path}")  # Debug-Ausgabe
+            if doc_path and self.pipeline is not None:
+                # Das angesehene Dokument vor die Stapelverarbeitung ziehen
+                self.pipeline.prioritize_threadsafe(doc_path)
             if doc_path and os.path.exists(doc_path):
                 self.preview_panel.show_preview(doc_path)
                 try:
@@ -96,10 +139,20 @@ class MainWindow(QMainWindow):
         if current_item:
             doc_path = current_item.data(Qt.UserRole)
             new_category = self.category_combo.currentText()
-            self.update_document_category(doc_path, new_category)
-            self.status_label.setText(f"Kategorie auf {new_category} geändert")
+            if self.apply_category(current_item, doc_path, new_category):
+                self.status_label.setText(f"Kategorie auf {new_category} geändert")
+
+    def apply_category(self, item, doc_path, new_category):
+        """Verschiebt sofort oder merkt die Kategorie vor, solange die Pipeline das Dokument noch verarbeitet"""
+        if self.pipeline is not None and not item.data(FILED_ROLE):
+            # Moving it now would pull the file away from the pipeline before its text is known
+            item.setData(CORRECTION_ROLE, new_category)
+            self.status_label.setText(f"Kategorie {new_category} wird nach der Verarbeitung übernommen")
+            return False
+        self.update_document_category(doc_path, new_category, item)
+        return True
 
-    def update_document_category(self, doc_path, new_category):
+    def update_document_category(self, doc_path, new_category, item=None):
         """Aktualisiert die Kategorie eines Dokuments"""
         self.pending_document = doc_path
         self.pending_category = new_category
@@ -124,19 +177,35 @@ class MainWindow(QMainWindow):
             os.rename(doc_path, new_path)
             
             # Aktualisiere UI
-            current_item = self.doc_list.currentItem()
-            if current_item:
-                current_item.setData(Qt.UserRole, new_path)
+            item = item or self.doc_list.currentItem()
+            if item:
+                item.setData(Qt.UserRole, new_path)
             self.status_label.setText(f"Dokument in {new_category} verschoben")
         
         except Exception as e:
+            new_path = doc_path
             self.status_label.setText(f"Fehler beim Verschieben: {str(e)}")
 
+        # Die Korrektur gilt auch, wenn das Verschieben fehlschlägt (Lernen im Hintergrund)
+        if self.pipeline is not None:
+            self.pipeline.learn_threadsafe(new_path, new_category, doc_path)
+
+    def is_interactive_scan(self):
+        """True, wenn gerade ein Scan über start_scan erwartet wird"""
+        return time.time() < self.interactive_until
+
+    def open_settings(self):
+        """Öffnet die Einstellungen (Parallelität interaktiv/Stapel)"""
+        if self.pipeline is None:
+            self.status_label.setText("Verarbeitung noch nicht gestartet")
+            return
+        SettingsDialog(self.pipeline.scheduler, self).exec_()
+
     def get_document_category(self, doc_path):
         """Ermittele die Kategorie eines Dokuments"""
 
         parent_dir = os.path.basename(os.path.dirname(doc_path))
-        if parent_dir in ["Rechnung", "Vertrag", "Mahnung", "Sonstiges"]:
+        if parent_dir in CATEGORIES:
             return parent_dir
         return "Sonstiges"
     
@@ -160,6 +229,7 @@ class MainWindow(QMainWindow):
             '''
             
             self.status_label.setText("Starte Scan-Prozess...")
+            self.interactive_until = time.time() + INTERACTIVE_SCAN_WINDOW
             subprocess.run(['osascript', '-e', apple_script])
             self.status_label.setText("Scan-Dialog geöffnet...")
         
@@ -176,8 +246,8 @@ class MainWindow(QMainWindow):
                     # Kategorie aus Combo-Box holen
                     category = self.category_combo.currentText()
                     # Dokument in die entsprechende Kategorie verschieben
-                    self.update_document_category(doc_path, category)
-                    self.status_label.setText("Dokument erfolgreich verarbeitet")
+                    if self.apply_category(current_item, doc_path, category):
+                        self.status_label.setText("Dokument erfolgreich verarbeitet")
                 else:
                     self.status_label.setText("Kein Dokumentenpfad gefunden")
             else:
@@ -191,6 +261,9 @@ class MainWindow(QMainWindow):
             current_item = self.doc_list.currentItem()
             if current_item:
                 doc_path = current_item.data(Qt.UserRole)
+                if doc_path and self.pipeline is not None:
+                    # Laufende OCR für das abgelehnte Dokument abbrechen
+                    self.pipeline.cancel_threadsafe(doc_path)
                 if doc_path and os.path.exists(doc_path):
                     # Move to rejected folder
                     rejected_path = os.path.join(WATCHED_FOLDER, "Abgelehnt")
@@ -4,7 +4,7 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtWidgets import QMainWindow
 
-from pdf2image import convert_from_path
+from ocr.image_decoder import ImageDecoder
 import tempfile
 
 import os
@@ -14,6 +14,7 @@ class PreviewPanel(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.main_window = parent
+        self.decoder = ImageDecoder()
         self.setup_ui()
 
     def setup_ui(self):
@@ -57,6 +58,7 @@ class PreviewPanel(QWidget):
                 return
             
             if image_path.lower().endswith('.pdf'):
+                from pdf2image import convert_from_path
                 try:
                     with tempfile.TemporaryDirectory() as path:
                         images = convert_from_path(image_path, dpi=200)
@@ -99,7 +101,7 @@ class PreviewPanel(QWidget):
     def reject_document(self):
         """Handle document rejection"""
         try:
-            if isinstance(self.main_windows, QMainWindow):
+            if isinstance(self.main_window, QMainWindow):
                 if hasattr(self.main_window, 'handle_rejected_document'):
                     self.main_window.handle_rejected_document()
                 else:
@@ -107,7 +109,7 @@ class PreviewPanel(QWidget):
             self.image_label.clear()
             self.status_label.setText("Dokument abgelehnt")
         except Exception as e:
-            self.status_label.set_Text(f"Fehler beim Ablehnen des Dokuments: {str(e)}")
+            self.status_label.setText(f"Fehler beim Ablehnen des Dokuments: {str(e)}")
 
     def clear_preview(self):
         """Clear the preview panel"""
@@ -122,9 +124,11 @@ class PreviewPanel(QWidget):
                 return
                 
             if image_path.lower().endswith('.pdf'):
+                from pdf2image import convert_from_path
                 # Convert PDF to image
                 with tempfile.TemporaryDirectory() as path:
-                    images = convert_from_path(image_path)
+                    # Only the first page at preview resolution, not every page at 200 DPI
+                    images = convert_from_path(image_path, dpi=100, first_page=1, last_page=1)
                     if images:
                         # Convert first page to QPixmap
                         first_page = images[0]
@@ -135,8 +139,11 @@ class PreviewPanel(QWidget):
                         self.status_label.setText("Keine Seiten im PDF gefunden")
                         return
             else:
-                # Handle normal image files
-                pixmap = QPixmap(image_path)
+                # Decode via the shared cache so OCR and preview use the same raster (also handles HEIC)
+                thumbnail = self.decoder.decode(image_path).thumbnail()
+                with tempfile.NamedTemporaryFile(suffix='.png') as tmp:
+                    thumbnail.save(tmp.name, 'PNG')
+                    pixmap = QPixmap(tmp.name)
                 
             if pixmap.isNull():
                 self.status_label.setText("Vorschau konnte nicht geladen werden")
@@ -0,0 +1,36 @@
+from PyQt5.QtWidgets import (QDialog, QFormLayout, QSpinBox, QDialogButtonBox)
+
+from scanner.scheduler import INTERACTIVE, BULK
+
+
+class SettingsDialog(QDialog):
+    def __init__(self, scheduler, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.setWindowTitle("Einstellungen")
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QFormLayout(self)
+
+        # Parallelität je Job-Klasse
+        self.interactive_spin = QSpinBox()
+        self.interactive_spin.setRange(1, 16)
+        self.interactive_spin.setValue(self.scheduler.limits[INTERACTIVE])
+        layout.addRow("Interaktive Jobs gleichzeitig:", self.interactive_spin)
+
+        self.bulk_spin = QSpinBox()
+        self.bulk_spin.setRange(1, 16)
+        self.bulk_spin.setValue(self.scheduler.limits[BULK])
+        layout.addRow("Stapel-Jobs gleichzeitig:", self.bulk_spin)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def accept(self):
+        """Übernimmt die Limits direkt in den laufenden Scheduler"""
+        self.scheduler.set_limit(INTERACTIVE, self.interactive_spin.value())
+        self.scheduler.set_limit(BULK, self.bulk_spin.value())
+        super().accept()
@@ -4,17 +4,24 @@ import logging
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from gui.main_window import MainWindow
-from PyQt5.QtWidgets import QListWidgetItem
 from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import Qt
-from scanner.document_processor import DocumentProcessor
+from scanner.scheduler import INTERACTIVE, BULK, Cancelled
+from worker.client import WorkerClient
 from config.settings import WATCHED_FOLDER
 
 
 class DocumentHandler(FileSystemEventHandler):
-    def __init__(self, window):
+    def __init__(self, window, pipeline=None, processor=None):
         super().__init__()
-        self.processor = DocumentProcessor()
+        if pipeline is None:
+            # The processing stack is only imported when no worker daemon is attached
+            from scanner.document_processor import DocumentProcessor
+            from scanner.async_pipeline import AsyncPipeline
+            processor = DocumentProcessor()
+            pipeline = AsyncPipeline(processor)
+            pipeline.start_in_thread()
+        self.processor = processor
+        self.pipeline = pipeline
         self.window = window
 
     def on_created(self, event):
@@ -22,20 +29,35 @@ class DocumentHandler(FileSystemEventHandler):
             return
         if event.src_path.lower().endswith(('.jpg', '.png', '.jpeg', '.heic', '.pdf')):
             logging.info(f"Neues Dokument erkannt: {event.src_path}")
-            self.window.status_label.setText(f"Verarbeite {os.path.basename(event.src_path)}...")
             
-            # Create item first, then add it to the list
-            item = QListWidgetItem(os.path.basename(event.src_path))
-            item.setData(Qt.UserRole, event.src_path)
-            self.window.doc_list.addItem(item)
+            # Add the list item on the GUI thread (this runs in the watchdog thread)
+            self.window.document_detected.emit(event.src_path)
             
-            # Process the document
-            try:
-                self.processor.process_document(event.src_path)
-                logging.info(f"Dokument verarbeitet: {os.path.basename(event.src_path)}")
-            except Exception as e:
-                logging.error(f"Fehler bei der Verarbeitung: {str(e)}")
-                self.window.status_label.setText(f"Fehler: {str(e)}")
+            # Frisch über "Dokument scannen" erzeugte Dateien überholen die Stapelverarbeitung
+            priority = INTERACTIVE if self.window.is_interactive_scan() else BULK
+            
+            # Process the document in the shared async pipeline
+            future = self.pipeline.submit_threadsafe(event.src_path, priority)
+            future.add_done_callback(lambda f, path=event.src_path: self._on_processed(path, f))
+
+    def on_deleted(self, event):
+        if event.is_directory:
+            return
+        # Deleted before it was filed: stop OCR instead of failing at the move
+        self.pipeline.cancel_threadsafe(event.src_path)
+
+    def _on_processed(self, document_path, future):
+        try:
+            target_path = future.result()
+            logging.info(f"Dokument verarbeitet: {os.path.basename(document_path)}")
+            # The list item must follow the file, or later corrections rename a path that is gone
+            self.window.document_filed.emit(document_path, target_path)
+        except Cancelled:
+            logging.info(f"Verarbeitung abgebrochen: {os.path.basename(document_path)}")
+        except Exception as e:
+            logging.error(f"Fehler bei der Verarbeitung: {str(e)}")
+            # Runs on the pipeline's (or worker client's) thread, so go through the signal
+            self.window.status_changed.emit(f"Fehler: {str(e)}")
 
 
 def main():
@@ -53,7 +75,13 @@ def main():
         os.makedirs(WATCHED_FOLDER)
         logging.info(f"Ordner wurde erstellt: {WATCHED_FOLDER}")
 
-    handler = DocumentHandler(window)
+    client = WorkerClient()
+    if client.available():
+        logging.info(f"Verbunden mit Worker-Daemon: {client.socket_path}")
+        handler = DocumentHandler(window, pipeline=client, processor=client)
+    else:
+        handler = DocumentHandler(window)
+    window.pipeline = handler.pipeline
     observer = Observer()
     observer.schedule(handler, WATCHED_FOLDER, recursive=False)
     observer.start()
@@ -67,6 +95,8 @@ def main():
         observer.stop()
         logging.info("Programm beendet")
         observer.join()
+    finally:
+        handler.pipeline.stop_thread()
 
 
 if __name__ == "__main__":
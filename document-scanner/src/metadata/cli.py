@@ -0,0 +1,72 @@
+"""Export und Auswertung der Dokument-Metadaten.
+
+    python -m metadata.cli export ZIEL [--format parquet|arrow|csv] [--from 2024-01] [--to 2024-12]
+    python -m metadata.cli query [--by sender,month] [--category Rechnungen] [--from ...] [--to ...]
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from metadata.store import MetadataStore, aggregate, COLUMNS
+
+
+def _export(store, args):
+    months = store.export(args.destination, fmt=args.format, start=args.start, end=args.end)
+    print(f"{months} Monat(e) nach {args.destination} exportiert ({args.format})")
+    return 0
+
+
+def _query(store, args):
+    columns = store.load(start=args.start, end=args.end)
+    if args.category:
+        mask = columns['category'] == args.category
+        columns = {name: values[mask] for name, values in columns.items()}
+
+    keys = [key.strip() for key in args.by.split(',') if key.strip()]
+    unknown = [key for key in keys if key not in COLUMNS]
+    if unknown:
+        print(f"Unbekannte Spalte(n): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    rows = aggregate(columns, keys=keys, value='amount')
+    if not rows:
+        print("Keine Datensätze gefunden")
+        return 0
+
+    widths = [max(len(key), *(len(row[0][i]) for row in rows)) for i, key in enumerate(keys)]
+    header = "  ".join(key.ljust(width) for key, width in zip(keys, widths))
+    print(f"{header}  {'Summe':>12}  {'Anzahl':>6}")
+    for key, total, count in rows:
+        label = "  ".join(part.ljust(width) for part, width in zip(key, widths))
+        print(f"{label}  {total:>12.2f}  {count:>6}")
+    print(f"Gesamt: {np.nansum(columns['amount']):.2f} in {columns['amount'].size} Dokumenten")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Metadaten verarbeiteter Dokumente exportieren und auswerten")
+    parser.add_argument("--store", help="Metadaten-Ordner (Standard: METADATA_DIR)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="nach Parquet, Arrow oder CSV exportieren")
+    export_parser.add_argument("destination")
+    export_parser.add_argument("--format", choices=["parquet", "arrow", "csv"], default="parquet")
+
+    query_parser = subparsers.add_parser("query", help="Beträge gruppiert summieren")
+    query_parser.add_argument("--by", default="sender,month", help="Gruppierungsspalten, kommagetrennt")
+    query_parser.add_argument("--category", help="nur diese Kategorie")
+
+    for sub in (export_parser, query_parser):
+        sub.add_argument("--from", dest="start", metavar="YYYY-MM")
+        sub.add_argument("--to", dest="end", metavar="YYYY-MM")
+
+    args = parser.parse_args(argv)
+    store = MetadataStore(args.store) if args.store else MetadataStore()
+    if args.command == "export":
+        return _export(store, args)
+    return _query(store, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
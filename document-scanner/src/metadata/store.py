@@ -0,0 +1,253 @@
+import csv
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from config.settings import METADATA_DIR
+
+pa = pa_csv = pa_dataset = None
+
+
+def _load_pyarrow():
+    """Importiert pyarrow erst bei Bedarf; False, wenn es nicht installiert ist."""
+    global pa, pa_csv, pa_dataset
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.csv
+            import pyarrow.dataset
+        except ImportError:
+            return False
+        pa, pa_csv, pa_dataset = pyarrow, pyarrow.csv, pyarrow.dataset
+    return True
+
+COLUMNS = [
+    'sha256', 'processed_at', 'month', 'document_date', 'sender', 'amount', 'category',
+    'document_type', 'invoice_number', 'iban', 'page_count',
+    'ocr_seconds', 'classify_seconds', 'total_seconds', 'source_name', 'target_path', 'rss_delta_mb',
+    'rss_estimate_mb',
+]
+NUMERIC_COLUMNS = {'amount', 'page_count', 'ocr_seconds', 'classify_seconds', 'total_seconds',
+                   'rss_delta_mb', 'rss_estimate_mb'}
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 einer Datei, blockweise gelesen."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _rounded(seconds):
+    return round(seconds, 3) if seconds is not None else None
+
+
+class MetadataStore:
+    """Anhängbarer Speicher für Metadaten verarbeiteter Dokumente.
+
+    Jeder Monat ist eine eigene CSV-Partition (month=YYYY-MM/records.csv), damit
+    Auswertungen nur die benötigten Monate lesen und Exporte monatsweise bleiben.
+    """
+
+    def __init__(self, base_dir=METADATA_DIR):
+        self.base_dir = base_dir
+        self._lock = threading.Lock()
+
+    def _partition_path(self, month):
+        return os.path.join(self.base_dir, f"month={month}", "records.csv")
+
+    def months(self):
+        if not os.path.isdir(self.base_dir):
+            return []
+        return sorted(
+            name.split('=', 1)[1] for name in os.listdir(self.base_dir)
+            if name.startswith('month=') and os.path.exists(os.path.join(self.base_dir, name, "records.csv"))
+        )
+
+    def append(self, record):
+        row = {column: record.get(column, '') for column in COLUMNS}
+        row = {column: '' if value is None else value for column, value in row.items()}
+        path = self._partition_path(row['month'])
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            is_new = not os.path.exists(path)
+            if not is_new:
+                self._migrate_header(path)
+            with open(path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=COLUMNS)
+                if is_new:
+                    writer.writeheader()
+                writer.writerow(row)
+
+    @staticmethod
+    def _migrate_header(path, destination=None):
+        """Schreibt eine Partition mit älterem Spaltensatz auf die aktuellen COLUMNS um.
+
+        Mit `destination` wird die umgeschriebene Partition dorthin geschrieben
+        (CSV-Export) und das Original bleibt unverändert.
+        """
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames == COLUMNS:
+                if destination is not None:
+                    shutil.copyfile(path, destination)
+                return
+            rows = list(reader)
+        tmp_path = (destination or path) + ".tmp"
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_path, destination or path)
+
+    def add_document(self, document_path, target_path, category, fields=None, stats=None):
+        """Erzeugt den Datensatz eines abgelegten Dokuments und hängt ihn an."""
+        stats = stats or {}
+        values = fields.as_dict() if fields is not None else {}
+        processed_at = datetime.now()
+
+        document_date = None
+        if values.get('date'):
+            document_date = datetime.strptime(values['date'], "%d.%m.%Y")
+        month = (document_date or processed_at).strftime("%Y-%m")
+
+        self.append({
+            'sha256': stats.get('sha256') or file_hash(target_path),
+            'processed_at': processed_at.isoformat(timespec='seconds'),
+            'month': month,
+            'document_date': document_date.strftime("%Y-%m-%d") if document_date else None,
+            'sender': values.get('sender'),
+            'amount': values.get('amount'),
+            'category': category,
+            'document_type': values.get('document_type'),
+            'invoice_number': values.get('invoice_number'),
+            'iban': values.get('iban'),
+            'page_count': stats.get('page_count'),
+            'ocr_seconds': _rounded(stats.get('ocr_seconds')),
+            'classify_seconds': _rounded(stats.get('classify_seconds')),
+            'total_seconds': _rounded(stats.get('total_seconds')),
+            'rss_delta_mb': _rounded(stats.get('rss_delta_mb')),
+            'rss_estimate_mb': _rounded(stats.get('rss_estimate_mb')),
+            'source_name': os.path.basename(document_path),
+            'target_path': target_path,
+        })
+
+    def _selected_months(self, start=None, end=None):
+        return [m for m in self.months() if (start is None or m >= start) and (end is None or m <= end)]
+
+    def _convert_options(self):
+        return pa_csv.ConvertOptions(column_types={
+            column: pa.float64() if column in NUMERIC_COLUMNS else pa.string() for column in COLUMNS
+        })
+
+    def _read_table(self, path):
+        # Partitions written before a column was added simply get it as nulls
+        table = pa_csv.read_csv(path, convert_options=self._convert_options())
+        for column in COLUMNS:
+            if column not in table.column_names:
+                column_type = pa.float64() if column in NUMERIC_COLUMNS else pa.string()
+                table = table.append_column(column, pa.nulls(table.num_rows, type=column_type))
+        return table.select(COLUMNS)
+
+    def load(self, start=None, end=None):
+        """Liest die Partitionen im Monatsbereich als Spalten (dict von NumPy-Arrays)."""
+        paths = [self._partition_path(month) for month in self._selected_months(start, end)]
+
+        if _load_pyarrow():
+            tables = [self._read_table(path) for path in paths]
+            if tables:
+                table = pa.concat_tables(tables)
+                return {
+                    column: table.column(column).to_numpy(zero_copy_only=False).astype(
+                        np.float64 if column in NUMERIC_COLUMNS else object)
+                    for column in COLUMNS
+                }
+
+        columns = {column: [] for column in COLUMNS}
+        for path in paths:
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    for column in COLUMNS:
+                        columns[column].append(row.get(column, ''))
+
+        result = {}
+        for column, values in columns.items():
+            if column in NUMERIC_COLUMNS:
+                result[column] = np.array([float(v) if v else np.nan for v in values], dtype=np.float64)
+            else:
+                result[column] = np.array(values, dtype=object)
+        return result
+
+    def export(self, destination, fmt='parquet', start=None, end=None):
+        """Exportiert die Datensätze nach Parquet/Arrow (Hive-partitioniert nach Monat) oder CSV.
+
+        Exportierte Monate werden ersetzt, andere Monate im Ziel bleiben erhalten,
+        so dass ein bestehender Export monatsweise fortgeschrieben werden kann.
+        """
+        months = self._selected_months(start, end)
+
+        if fmt == 'csv':
+            for month in months:
+                target_dir = os.path.join(destination, f"month={month}")
+                os.makedirs(target_dir, exist_ok=True)
+                # Older partitions get the current header, so the exported dataset has one schema
+                with self._lock:
+                    self._migrate_header(self._partition_path(month), os.path.join(target_dir, "records.csv"))
+            return len(months)
+
+        if not _load_pyarrow():
+            raise RuntimeError("Parquet/Arrow-Export benötigt das Paket 'pyarrow'")
+        if not months:
+            return 0
+
+        tables = [self._read_table(self._partition_path(month)) for month in months]
+        extension = 'parquet' if fmt == 'parquet' else 'arrow'
+        pa_dataset.write_dataset(
+            pa.concat_tables(tables),
+            destination,
+            format='parquet' if fmt == 'parquet' else 'ipc',
+            partitioning=pa_dataset.partitioning(pa.schema([('month', pa.string())]), flavor='hive'),
+            basename_template=f"part-{{i}}.{extension}",
+            existing_data_behavior='delete_matching',
+        )
+        logging.info(f"{sum(t.num_rows for t in tables)} Datensätze nach {destination} exportiert ({fmt})")
+        return len(months)
+
+
+def aggregate(columns, keys=('sender', 'month'), value='amount'):
+    """Summiert `value` je Schlüsselkombination, vektorisiert über NumPy.
+
+    Gibt eine Liste von (Schlüssel-Tupel, Summe, Anzahl) sortiert nach Schlüssel zurück.
+    """
+    values = columns[value]
+    if values.size == 0:
+        return []
+
+    # Encode each key column as integer codes, then combine them into one group id
+    group_ids = np.zeros(values.size, dtype=np.int64)
+    uniques = []
+    for key in keys:
+        labels, codes = np.unique(columns[key].astype(str), return_inverse=True)
+        group_ids = group_ids * len(labels) + codes
+        uniques.append(labels)
+
+    groups, inverse = np.unique(group_ids, return_inverse=True)
+    valid = ~np.isnan(values)
+    sums = np.bincount(inverse[valid], weights=values[valid], minlength=groups.size)
+    counts = np.bincount(inverse, minlength=groups.size)
+
+    rows = []
+    for group, total, count in zip(groups, sums, counts):
+        key = []
+        for labels in reversed(uniques):
+            group, code = divmod(int(group), len(labels))
+            key.append(str(labels[code]))
+        rows.append((tuple(reversed(key)), round(float(total), 2), int(count)))
+    return rows
@@ -1,16 +1,29 @@
-import pytesseract
-from PIL import Image
-import pdf2image
 import logging
+from ocr.image_decoder import ImageDecoder
 
 class TextExtractor:
     def __init__(self):
-        pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'
+        self.decoder = ImageDecoder()
+        self._pytesseract = None
+
+    @property
+    def pytesseract(self):
+        # Imported on first OCR so that constructing the extractor stays cheap
+        if self._pytesseract is None:
+            import pytesseract
+            pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'
+            self._pytesseract = pytesseract
+        return self._pytesseract
 
     def extract_text(self, file_path):
+        text, _ = self.extract_pages(file_path)
+        return text
+
+    def extract_pages(self, file_path, cancel_token=None, dpi=200, on_page=None):
+        """Liefert (Text, Seitenanzahl); `cancel_token.checkpoint()` wird vor jeder Seite aufgerufen."""
         try:
             if file_path.lower().endswith('.pdf'):
-                return self._extract_text_from_pdf(file_path)
+                return self._extract_text_from_pdf(file_path, cancel_token, dpi, on_page)
             else:
                 return self._extract_text_from_image(file_path)
         except Exception as e:
@@ -19,14 +32,21 @@ class TextExtractor:
 
     
     def _extract_text_from_image(self, image_path):
-        with Image.open(image_path) as img:
-            text = pytesseract.image_to_string(img, lang='deu')
-            return text.strip()
+        decoded = self.decoder.decode(image_path)
+        text = self.pytesseract.image_to_string(decoded.image, lang='deu')
+        return text.strip(), 1
         
     
-    def _extract_text_from_pdf(self, pdf_path):
-        images = pdf2image.convert_from_path(pdf_path)
+    def _extract_text_from_pdf(self, pdf_path, cancel_token=None, dpi=200, on_page=None):
+        import pdf2image
+        page_count = pdf2image.pdfinfo_from_path(pdf_path)['Pages']
         text = ""
-        for img in images:
-            text += pytesseract.image_to_string(img, lang='deu') + "\n"
-        return text.strip()
\ No newline at end of file
+        # Rasterize page by page so a cancelled document stops between pages
+        for page in range(1, page_count + 1):
+            if cancel_token is not None:
+                cancel_token.checkpoint()
+            for img in pdf2image.convert_from_path(pdf_path, dpi=dpi, first_page=page, last_page=page):
+                text += self.pytesseract.image_to_string(img, lang='deu') + "\n"
+            if on_page is not None:
+                on_page(page)
+        return text.strip(), page_count
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""scan-file: ein einzelnes Dokument analysieren (oder ablegen).
+
+    python scan_file.py PFAD [--file] [--local]
+
+Läuft der Worker-Daemon (python -m worker.daemon), antwortet er ohne Import- und
+Modell-Ladezeit; sonst wird die Verarbeitung im eigenen Prozess geladen.
+"""
+import argparse
+import json
+import os
+import sys
+
+from worker.client import WorkerClient
+
+
+def _scan_local(path, file_document):
+    from scanner.document_processor import DocumentProcessor
+    processor = DocumentProcessor()
+    if file_document:
+        processor.process_document(path)
+        return {'filed': True}
+    text, stats = processor.extract(path)
+    category, suggested_filename, fields = processor.classify(text)
+    return {
+        'category': category,
+        'filename': suggested_filename,
+        'page_count': stats['page_count'],
+        'fields': fields.as_dict() if fields is not None else {},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dokument analysieren oder ablegen")
+    parser.add_argument("path")
+    parser.add_argument("--file", action="store_true", help="Dokument auch einsortieren und verschieben")
+    parser.add_argument("--local", action="store_true", help="Worker-Daemon nicht verwenden")
+    args = parser.parse_args(argv)
+
+    path = os.path.abspath(args.path)
+    if not os.path.exists(path):
+        print(f"Datei nicht gefunden: {path}", file=sys.stderr)
+        return 1
+
+    client = WorkerClient()
+    if not args.local and client.available():
+        if args.file:
+            result = {'target_path': client.request('process', path=path, priority='interactive')['target_path']}
+        else:
+            result = client.analyze(path)
+            result.pop('ok', None)
+    else:
+        result = _scan_local(path, args.file)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scanner.scheduler import PriorityScheduler, CancelToken, Cancelled, INTERACTIVE, BULK
+
+
+class LocalStorage:
+    """Blockierende Dateizugriffe in einem eigenen Thread-Pool.
+
+    Bei iCloud-Ordnern lädt macOS Dateien erst beim Lesen herunter; das
+    passiert hier, ohne die Event-Loop oder die OCR-Threads zu blockieren.
+    """
+
+    chunk_size = 1024 * 1024
+
+    def __init__(self, max_workers=4):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage-io")
+
+    async def run_blocking(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def _read_through(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    return digest.hexdigest()
+                digest.update(chunk)
+
+    async def materialize(self, path):
+        """Liest die Datei einmal vollständig, damit sie lokal vorliegt. Gibt den SHA-256 zurück."""
+        return await self.run_blocking(self._read_through, path)
+
+    async def read_bytes(self, path):
+        def read():
+            with open(path, 'rb') as f:
+                return f.read()
+        return await self.run_blocking(read)
+
+    async def move(self, src, dst):
+        return await self.run_blocking(shutil.move, src, dst)
+
+    async def exists(self, path):
+        return await self.run_blocking(os.path.exists, path)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+class DelayedStorage(LocalStorage):
+    """Lokaler Ersatz für Cloud-Speicher mit künstlicher Latenz (für Tests)."""
+
+    def __init__(self, read_delay=1.0, move_delay=0.5, max_workers=4):
+        super().__init__(max_workers=max_workers)
+        self.read_delay = read_delay
+        self.move_delay = move_delay
+
+    async def materialize(self, path):
+        await asyncio.sleep(self.read_delay)
+        return await super().materialize(path)
+
+    async def read_bytes(self, path):
+        await asyncio.sleep(self.read_delay)
+        return await super().read_bytes(path)
+
+    async def move(self, src, dst):
+        await asyncio.sleep(self.move_delay)
+        return await super().move(src, dst)
+
+
+class _QueuedDocument:
+    __slots__ = ('path', 'future', 'token', 'fetch', 'skip', 'filing')
+
+    def __init__(self, path, future, token):
+        self.path = path
+        self.future = future
+        self.token = token
+        self.fetch = None
+        self.skip = False
+        self.filing = False  # target planned and move started; no longer cancellable
+
+
+class AsyncPipeline:
+    """Gemeinsamer Verarbeitungskern für Ordnerüberwachung und Stapelverarbeitung.
+
+    Die nächsten `prefetch` Dokumente werden schon heruntergeladen, während das
+    aktuelle per OCR gelesen wird; Verschiebungen laufen im Hintergrund weiter.
+    OCR und Klassifizierung laufen über den PriorityScheduler: interaktive
+    Dokumente überholen die Stapel-Warteschlange und lassen sich abbrechen.
+    """
+
+    def __init__(self, processor, storage=None, prefetch=2, workers=4, scheduler=None):
+        self.processor = processor
+        self.storage = storage if storage is not None else LocalStorage()
+        self.scheduler = scheduler if scheduler is not None else PriorityScheduler()
+        self.prefetch = prefetch
+        self.workers = workers
+        self.loop = None
+        self._incoming = None
+        self._ready = None
+        self._tasks = []
+        self._moves = set()
+        self._interactive = set()
+        self._documents = {}  # path -> _QueuedDocument for documents not finished yet
+        self._reserved = set()
+        self._plan_lock = None
+        self._thread = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._incoming = asyncio.Queue()
+        self._ready = asyncio.Queue(maxsize=self.prefetch)
+        self._plan_lock = asyncio.Lock()
+        self._tasks = [asyncio.create_task(self._prefetcher())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        pending = self._moves | self._interactive
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, document_path, priority=BULK):
+        """Reiht ein Dokument ein; das Future liefert den Zielpfad.
+
+        Interaktive Dokumente umgehen die Stapel-Warteschlange und starten sofort.
+        """
+        document = _QueuedDocument(document_path, self.loop.create_future(), CancelToken(priority))
+        self._documents[document_path] = document
+        document.future.add_done_callback(lambda _: self._forget(document))
+        if priority == INTERACTIVE:
+            self._start_interactive(document)
+        else:
+            self._incoming.put_nowait(document)
+        return document.future
+
+    async def process(self, document_path, priority=BULK):
+        return await self.submit(document_path, priority)
+
+    def _forget(self, document):
+        if self._documents.get(document.path) is document:
+            del self._documents[document.path]
+
+    def _start_interactive(self, document):
+        task = asyncio.create_task(self._process(document))
+        self._interactive.add(task)
+        task.add_done_callback(self._interactive.discard)
+
+    def prioritize(self, document_path):
+        """Zieht ein wartendes oder laufendes Dokument in die interaktive Klasse vor."""
+        document = self._documents.get(document_path)
+        if document is None or document.token.priority == INTERACTIVE:
+            return
+        document.token.priority = INTERACTIVE
+        if not self.scheduler.reprioritize(document_path, INTERACTIVE) and document.fetch is None:
+            # Still waiting in the bulk queue: skip that entry and start it right away
+            document.skip = True
+            self._start_interactive(document)
+
+    def cancel(self, document_path):
+        """Bricht die Verarbeitung ab (z.B. bei abgelehnten oder gelöschten Dokumenten)."""
+        document = self._documents.get(document_path)
+        if document is None or document.filing:
+            # A move across volumes deletes the source, which must not cancel the filing itself
+            return
+        document.token.cancel()
+        document.skip = True
+        self.scheduler.cancel(document_path)
+        if not document.future.done():
+            document.future.set_exception(Cancelled())
+        logging.info(f"Verarbeitung abgebrochen: {os.path.basename(document_path)}")
+
+    async def learn_correction(self, document_path, category, original_path=None):
+        """Gibt eine Korrektur an den lernenden Klassifikator weiter (im I/O-Pool, nicht im Scheduler)."""
+        return await self.storage.run_blocking(
+            self.processor.learn_correction, document_path, category, original_path)
+
+    async def _prefetcher(self):
+        while True:
+            document = await self._incoming.get()
+            if document.skip:
+                continue
+            document.fetch = asyncio.create_task(self.storage.materialize(document.path))
+            # Blocks once `prefetch` documents are downloaded ahead of the workers
+            await self._ready.put(document)
+
+    async def _worker(self):
+        while True:
+            document = await self._ready.get()
+            if document.skip:
+                document.fetch.cancel()
+                continue
+            await self._process(document)
+
+    async def _run_job(self, document, fn, *args):
+        job = self.scheduler.submit(
+            fn, *args, priority=document.token.priority, key=document.path, token=document.token)
+        try:
+            return await asyncio.wrap_future(job.future)
+        except asyncio.CancelledError:
+            if job.future.cancelled():
+                # Cancelled while queued in the scheduler; only a cancelled task may end the worker
+                raise Cancelled()
+            raise
+
+    async def _process(self, document):
+        document_path, future, token = document.path, document.future, document.token
+        try:
+            started = time.perf_counter()
+            if document.fetch is None:
+                document.fetch = asyncio.create_task(self.storage.materialize(document_path))
+            stats = {'sha256': await document.fetch}
+            ocr_started = time.perf_counter()
+            text, extract_stats = await self._run_job(document, self.processor.extract, document_path)
+            stats.update(extract_stats)
+            stats['ocr_seconds'] = time.perf_counter() - ocr_started
+            classify_started = time.perf_counter()
+            category, suggested_filename, fields = await self._run_job(document, self.processor.classify, text)
+            stats['classify_seconds'] = time.perf_counter() - classify_started
+            if token.cancelled:
+                raise Cancelled()
+            async with self._plan_lock:
+                target_path = await self.storage.run_blocking(
+                    self.processor.plan_target, document_path, category, suggested_filename, set(self._reserved))
+                self._reserved.add(target_path)
+
+            document.filing = True
+            move = asyncio.create_task(self._move(document_path, target_path, text, category, fields, stats, started, future))
+            self._moves.add(move)
+            move.add_done_callback(self._moves.discard)
+        except (Cancelled, concurrent.futures.CancelledError):
+            if not future.done():
+                future.set_exception(Cancelled())
+        except asyncio.CancelledError:
+            # The task itself is being cancelled (stop()); swallowing it would keep the worker alive
+            if not future.done():
+                future.set_exception(Cancelled())
+            raise
+        except Exception as e:
+            logging.error(f"Fehler beim Verarbeiten des Dokuments: {str(e)}")
+            if not future.done():
+                future.set_exception(e)
+
+    async def _move(self, document_path, target_path, text, category, fields, stats, started, future):
+        try:
+            await self.storage.move(document_path, target_path)
+            stats['total_seconds'] = time.perf_counter() - started
+            await self.storage.run_blocking(
+                self.processor.finish_document, document_path, target_path, text, category, fields, stats)
+            if not future.done():
+                future.set_result(target_path)
+        except Exception as e:
+            logging.error(f"Fehler beim Verschieben des Dokuments: {str(e)}")
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self._reserved.discard(target_path)
+
+    async def run_batch(self, document_paths, priority=BULK):
+        """Verarbeitet alle Pfade; Ergebnis ist je Pfad der Zielpfad oder die Exception."""
+        await self.start()
+        try:
+            return await asyncio.gather(*(self.process(p, priority) for p in document_paths), return_exceptions=True)
+        finally:
+            await self.stop()
+
+    def start_in_thread(self):
+        """Startet die Event-Loop in einem Hintergrund-Thread (für den Watchdog-Observer)."""
+        started = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+            loop.run_until_complete(self.stop())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="async-pipeline", daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def submit_threadsafe(self, document_path, priority=BULK):
+        """Aus einem fremden Thread einreihen; gibt ein concurrent.futures.Future zurück."""
+        return asyncio.run_coroutine_threadsafe(self.process(document_path, priority), self.loop)
+
+    def learn_threadsafe(self, document_path, category, original_path=None):
+        return asyncio.run_coroutine_threadsafe(
+            self.learn_correction(document_path, category, original_path), self.loop)
+
+    def prioritize_threadsafe(self, document_path):
+        self.loop.call_soon_threadsafe(self.prioritize, document_path)
+
+    def cancel_threadsafe(self, document_path):
+        self.loop.call_soon_threadsafe(self.cancel, document_path)
+
+    def stop_thread(self):
+        if self._thread is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self._thread = None
+        self.scheduler.shutdown()
+        self.processor.close()
+
+
+def process_batch(processor, document_paths, storage=None, prefetch=2, workers=4):
+    """Synchroner Einstieg für die Stapelverarbeitung (Priorität BULK)."""
+    pipeline = AsyncPipeline(processor, storage=storage, prefetch=prefetch, workers=workers)
+    try:
+        return asyncio.run(pipeline.run_batch(document_paths))
+    finally:
+        pipeline.storage.close()
+        pipeline.scheduler.shutdown()
+        processor.close()
@@ -3,60 +3,145 @@ import shutil
 from ocr.text_extractor import TextExtractor
 from classifier.document_classifier import DocumentClassifier
 import logging
+import time
+from collections import OrderedDict
+from metadata.store import MetadataStore, file_hash
+from scanner.resource_governor import ResourceGovernor
+from config.settings import CATEGORIES
 
 class DocumentProcessor:
     def __init__(self):
         self.text_extractor = TextExtractor()
         self.classifier = DocumentClassifier()
         self.output_base = os.path.expanduser("~/Documents/Sortierte_Dokumente")  # Fixed variable name
+        self._recent_texts = OrderedDict()  # path -> OCR text, so corrections don't need a re-OCR
+        self.metadata_store = MetadataStore()
+        self.governor = ResourceGovernor()
         self._ensure_output_directories()
 
     def _ensure_output_directories(self):
-        categories = ["Rechnungen", "Verträge", "Bescheinigungen", "Sonstiges"]
-        for category in categories:
+        for category in CATEGORIES:
             path = os.path.join(self.output_base, category)  # Uses correct variable name
             os.makedirs(path, exist_ok=True)
 
-    def process_document(self, document_path):
+    def process_document(self, document_path, cancel_token=None):
         try:
-            # Extract text from document
-            text = self.text_extractor.extract_text(document_path)
-            
-            # Get category and suggested filename
-            category, suggested_filename = self.classifier.classify(text)
+            started = time.perf_counter()
+            stats = {'sha256': file_hash(document_path)}
             
-            # Ensure category is a string
-            if not isinstance(category, str):
-                logging.warning(f"Invalid category type: {type(category)}. Using 'Sonstiges'")
-                category = "Sonstiges"
-
-            # Create target directory path
-            target_dir = os.path.join(self.output_base, category)
-            
-            # Get original filename and extension
-            original_filename = os.path.basename(document_path)
-            original_ext = os.path.splitext(document_path)[1]
+            # Extract text from document
+            text, extract_stats = self.extract(document_path, cancel_token)
+            stats.update(extract_stats)
+            stats['ocr_seconds'] = time.perf_counter() - started
             
-            # Create new filename with extension
-            if suggested_filename and isinstance(suggested_filename, str):
-                new_filename = f"{suggested_filename}{original_ext}"
-            else:
-                new_filename = original_filename
+            # Get category, suggested filename and structured fields
+            classify_started = time.perf_counter()
+            category, suggested_filename, fields = self.classify(text, cancel_token)
+            stats['classify_seconds'] = time.perf_counter() - classify_started
+            if cancel_token is not None:
+                cancel_token.checkpoint()
             
             # Create target path
-            target_path = os.path.join(target_dir, new_filename)
-            
-            # Handle duplicate filenames
-            counter = 1
-            while os.path.exists(target_path):
-                base, ext = os.path.splitext(new_filename)
-                target_path = os.path.join(target_dir, f"{base} ({counter}){ext}")
-                counter += 1
+            target_path = self.plan_target(document_path, category, suggested_filename)
             
             # Move the file
             shutil.move(document_path, target_path)
-            logging.info(f"Dokument verarbeitet: {new_filename} -> {category}")
+            stats['total_seconds'] = time.perf_counter() - started
+            self.finish_document(document_path, target_path, text, category, fields, stats)
             
         except Exception as e:
             logging.error(f"Fehler beim Verarbeiten des Dokuments: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def extract(self, document_path, cancel_token=None):
+        """Pipeline-Stufe: OCR des Dokuments, liefert (Text, Statistik).
+
+        Der Job startet erst, wenn der ResourceGovernor Speicher zuteilt; unter
+        Druck wird mit reduzierter DPI gerastert.
+        """
+        stats = {}
+        with self.governor.admit(document_path, cancel_token) as reservation:
+            text, stats['page_count'] = self.text_extractor.extract_pages(
+                document_path, cancel_token, dpi=reservation.dpi, on_page=reservation.sample)
+        stats['rss_delta_mb'] = reservation.rss_delta_mb
+        stats['rss_estimate_mb'] = reservation.estimate_mb
+        return text, stats
+
+    def classify(self, text, cancel_token=None):
+        """Pipeline-Stufe: Felder extrahieren, Kategorie und Dateiname bestimmen."""
+        if cancel_token is not None:
+            cancel_token.checkpoint()
+        fields = self.classifier.extract_fields(text)
+        category, suggested_filename = self.classifier.classify(text, fields=fields)
+        
+        # Ensure category is a string
+        if not isinstance(category, str):
+            logging.warning(f"Invalid category type: {type(category)}. Using 'Sonstiges'")
+            category = "Sonstiges"
+        return category, suggested_filename, fields
+
+    def plan_target(self, document_path, category, suggested_filename, reserved=()):
+        """Pipeline-Stufe: freien Zielpfad bestimmen; `reserved` sind noch laufende Verschiebungen."""
+        # Create target directory path (learned categories may not exist yet)
+        target_dir = os.path.join(self.output_base, category)
+        os.makedirs(target_dir, exist_ok=True)
+        
+        # Get original filename and extension
+        original_filename = os.path.basename(document_path)
+        original_ext = os.path.splitext(document_path)[1]
+        
+        # Create new filename with extension
+        if suggested_filename and isinstance(suggested_filename, str):
+            new_filename = f"{suggested_filename}{original_ext}"
+        else:
+            new_filename = original_filename
+        
+        target_path = os.path.join(target_dir, new_filename)
+        
+        # Handle duplicate filenames
+        counter = 1
+        while os.path.exists(target_path) or target_path in reserved:
+            base, ext = os.path.splitext(new_filename)
+            target_path = os.path.join(target_dir, f"{base} ({counter}){ext}")
+            counter += 1
+        return target_path
+
+    def finish_document(self, document_path, target_path, text, category, fields=None, stats=None):
+        """Pipeline-Stufe nach dem Verschieben: Text merken, Metadaten speichern, protokollieren."""
+        self._remember_text(text, document_path, target_path)
+        logging.info(f"Dokument verarbeitet: {os.path.basename(target_path)} -> {category}")
+        try:
+            self.metadata_store.add_document(document_path, target_path, category, fields, stats)
+        except Exception as e:
+            logging.error(f"Fehler beim Speichern der Metadaten: {str(e)}")
+
+    def _remember_text(self, text, *paths, max_entries=256):
+        for path in paths:
+            self._recent_texts[path] = text
+            self._recent_texts.move_to_end(path)
+        while len(self._recent_texts) > max_entries:
+            self._recent_texts.popitem(last=False)
+
+    def learn_correction(self, document_path, category, original_path=None):
+        """Lernt aus einer vom Benutzer bestätigten oder korrigierten Kategorie.
+
+        Nutzt nur den OCR-Text aus der Verarbeitung; ohne ihn wird die Korrektur
+        übersprungen statt das Dokument nur fürs Lernen erneut zu lesen.
+        Nicht im GUI-Thread aufrufen (siehe AsyncPipeline.learn_threadsafe).
+        """
+        try:
+            text = self._recent_texts.get(document_path) or self._recent_texts.get(original_path)
+            if text is None:
+                logging.info(f"Kein OCR-Text für {os.path.basename(document_path)}, Korrektur wird nicht gelernt")
+                return False
+            self._remember_text(text, document_path)
+            self.classifier.learn(text, category)
+            logging.info(f"Kategorie gelernt: {os.path.basename(document_path)} -> {category}")
+            return True
+        except Exception as e:
+            logging.error(f"Fehler beim Lernen der Korrektur: {str(e)}")
+            return False
+
+    def close(self):
+        """Schreibt ausstehende Änderungen des gelernten Klassifikators."""
+        self.classifier.learned.flush()
@@ -1,21 +1,39 @@
 import os
+import sys
 import time
 import logging
+import argparse
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from document_processor import DocumentProcessor
+from worker.client import WorkerClient
+
+DOCUMENT_EXTENSIONS = ('.jpg', '.png', '.pdf', '.jpeg', '.heic')
 
 class DocumentHandler(FileSystemEventHandler):
     def __init__(self):
         super().__init__()
-        self.processor = DocumentProcessor()
+        client = WorkerClient()
+        if client.available():
+            logging.info(f"Verbunden mit Worker-Daemon: {client.socket_path}")
+            self.pipeline = client
+        else:
+            from document_processor import DocumentProcessor
+            from async_pipeline import AsyncPipeline
+            self.pipeline = AsyncPipeline(DocumentProcessor())
+            self.pipeline.start_in_thread()
 
     def on_created(self, event):
         if event.is_directory:
             return
-        if event.src_path.lower().endswith(('.jpg', '.png', '.pdf', '.jpeg', '.heic')):
+        if event.src_path.lower().endswith(DOCUMENT_EXTENSIONS):
             logging.info(f"Neues Dokument erkannt: {event.src_path}")
-            self.processor.process_document(event.src_path)
+            self.pipeline.submit_threadsafe(event.src_path)
+
+    def on_deleted(self, event):
+        if event.is_directory:
+            return
+        # Deleted before it was filed: stop OCR instead of failing at the move
+        self.pipeline.cancel_threadsafe(event.src_path)
 
 def ensure_directories():
     # Debug: Zeige alle verfügbaren Pfade
@@ -73,7 +91,35 @@ def start_watching(directory):
         observer.stop()
         logging.info("Überwachung beendet")
     observer.join()
+    event_handler.pipeline.stop_thread()
+
+def run_batch(directory):
+    """Verarbeitet alle vorhandenen Dokumente eines Ordners über dieselbe Pipeline."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(DOCUMENT_EXTENSIONS)
+    )
+    logging.info(f"Stapelverarbeitung: {len(paths)} Dokumente in {directory}")
+    
+    from document_processor import DocumentProcessor
+    from async_pipeline import process_batch
+    results = process_batch(DocumentProcessor(), paths)
+    failed = sum(1 for result in results if isinstance(result, Exception))
+    logging.info(f"Stapelverarbeitung beendet: {len(paths) - failed} verarbeitet, {failed} fehlgeschlagen")
+    return 1 if failed else 0
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan-Ordner überwachen oder einmalig abarbeiten")
+    parser.add_argument("--batch", metavar="ORDNER", help="alle Dokumente im Ordner verarbeiten und beenden")
+    args = parser.parse_args()
+    
+    if args.batch:
+        sys.exit(run_batch(args.batch))
     scan_dir = ensure_directories()
     start_watching(scan_dir)
\ No newline at end of file
@@ -0,0 +1,193 @@
+import logging
+import math
+import os
+import sys
+import threading
+
+from config.settings import MEMORY_BUDGET_MB, OCR_DPI, MIN_OCR_DPI, OCR_MAX_PIXELS
+from ocr.image_decoder import shared_cache
+
+MB = 1024 * 1024
+A4_AREA_SQIN = 8.27 * 11.69
+# Tesseract keeps its own binarized copies next to the PIL raster
+OCR_WORKSPACE_FACTOR = 2.5
+
+
+def estimate_raster_bytes(pages, dpi, channels=3, page_area=A4_AREA_SQIN):
+    """Speicher für `pages` gerasterte Seiten: Seiten × DPI² × Fläche × Kanäle."""
+    return int(pages * dpi * dpi * page_area * channels)
+
+
+def current_rss():
+    """Aktueller Speicherverbrauch (RSS) des Prozesses in Bytes."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        pass
+    # Without psutil macOS only offers the peak RSS (in bytes there, KiB on Linux)
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Reservation:
+    """Zugeteilter Speicher eines Jobs; misst den RSS-Zuwachs des Prozesses während des Jobs.
+
+    Pausiert der Job für interaktive Jobs (CancelToken.checkpoint), wird die
+    Reservation so lange freigegeben und vor dem Weiterlaufen neu zugeteilt.
+    """
+
+    def __init__(self, governor, estimate, dpi, cancel_token=None):
+        self.governor = governor
+        self.estimate = estimate
+        self.dpi = dpi
+        self.cancel_token = cancel_token
+        self.held = True
+        self.start_rss = current_rss()
+        self.peak_rss = self.start_rss
+        self._delta = 0
+        self._hook = None
+
+    def sample(self, *_):
+        """Nach jeder Seite aufrufen, um den Spitzenwert zu aktualisieren."""
+        self.peak_rss = max(self.peak_rss, current_rss())
+
+    @property
+    def rss_delta(self):
+        """Höchster RSS-Zuwachs gegenüber der Zulassung (ohne Pausen); enthält parallel laufende Jobs."""
+        return max(self._delta, self.peak_rss - self.start_rss, 0)
+
+    @property
+    def rss_delta_mb(self):
+        return self.rss_delta / MB
+
+    @property
+    def estimate_mb(self):
+        return self.estimate / MB
+
+    def suspend(self):
+        self.sample()
+        self._delta = self.rss_delta
+        if self.held:
+            self.governor.release(self)
+
+    def resume(self):
+        self.governor.readmit(self, self.cancel_token)
+        # Memory used by the interactive job during the pause does not count towards this job
+        self.start_rss = self.peak_rss = current_rss()
+
+    def __enter__(self):
+        if self.cancel_token is not None:
+            self._hook = self.cancel_token.add_pause_hook(self.suspend, self.resume)
+        return self
+
+    def __exit__(self, *exc):
+        if self._hook is not None:
+            self.cancel_token.remove_pause_hook(self._hook)
+            self._hook = None
+        self.sample()
+        if self.held:
+            self.governor.release(self)
+        return False
+
+
+class ResourceGovernor:
+    """Lässt Jobs nur zu, solange die geschätzte Summe ins RSS-Budget passt.
+
+    Unter Druck wird zuerst der Decode-Cache geleert, dann die Raster-DPI
+    gesenkt (bis MIN_OCR_DPI); passt auch das nicht, wartet der Job, bis andere
+    fertig sind. Ein einzelner Job wird immer zugelassen, damit nichts
+    dauerhaft blockiert.
+    """
+
+    def __init__(self, budget_mb=MEMORY_BUDGET_MB, dpi=OCR_DPI, min_dpi=MIN_OCR_DPI, cache=shared_cache):
+        self.budget = budget_mb * MB
+        self.dpi = dpi
+        self.min_dpi = min_dpi
+        self.cache = cache
+        self._reserved = 0
+        self._active = 0
+        self._baseline = current_rss()
+        self._cond = threading.Condition()
+
+    def _available(self):
+        if self._active == 0:
+            self._baseline = current_rss()
+        used = max(current_rss(), self._baseline + self._reserved)
+        return self.budget - used
+
+    def _estimate(self, document_path, dpi):
+        if document_path.lower().endswith('.pdf'):
+            # Pages are rasterized one at a time, so only one page is resident
+            raster = estimate_raster_bytes(1, dpi)
+        else:
+            raster = OCR_MAX_PIXELS * 3
+        return int(raster * OCR_WORKSPACE_FACTOR)
+
+    def _plan(self, document_path, available):
+        """Höchste DPI, deren Schätzung in `available` passt; None, wenn selbst MIN_OCR_DPI nicht passt."""
+        dpi = self.dpi
+        estimate = self._estimate(document_path, dpi)
+        if estimate <= available:
+            return dpi, estimate
+        if not document_path.lower().endswith('.pdf'):
+            return None
+        per_dpi2 = self._estimate(document_path, 1)
+        dpi = int(math.sqrt(max(available, 0) / per_dpi2)) // 25 * 25
+        if dpi < self.min_dpi:
+            return None
+        return dpi, self._estimate(document_path, dpi)
+
+    def admit(self, document_path, cancel_token=None):
+        """Wartet auf freien Speicher und gibt eine Reservation (Context-Manager) zurück."""
+        with self._cond:
+            while True:
+                plan = self._plan(document_path, self._available())
+                if (plan is None or plan[0] < self.dpi) and self.cache is not None and self.cache.nbytes:
+                    freed = self.cache.shrink(0)
+                    logging.info(f"Speicherdruck: Decode-Cache geleert ({freed / MB:.0f} MB)")
+                    continue
+                if plan is None and self._active == 0:
+                    plan = (self.min_dpi, self._estimate(document_path, self.min_dpi))
+                if plan is not None:
+                    break
+                if cancel_token is not None and cancel_token.cancelled:
+                    cancel_token.checkpoint()
+                self._cond.wait(timeout=0.5)
+
+            dpi, estimate = plan
+            if dpi < self.dpi:
+                logging.info(f"Speicherdruck: {os.path.basename(document_path)} wird mit {dpi} DPI gerastert")
+            self._reserved += estimate
+            self._active += 1
+            return Reservation(self, estimate, dpi, cancel_token)
+
+    def readmit(self, reservation, cancel_token=None):
+        """Teilt einer pausierten Reservation ihren Speicher wieder zu (gleiche DPI).
+
+        Bei Abbruch bleibt sie freigegeben; der folgende checkpoint() bricht den Job ab.
+        """
+        with self._cond:
+            while self._active > 0 and reservation.estimate > self._available():
+                if self.cache is not None and self.cache.nbytes:
+                    self.cache.shrink(0)
+                    continue
+                if cancel_token is not None and cancel_token.cancelled:
+                    return
+                self._cond.wait(timeout=0.5)
+            self._reserved += reservation.estimate
+            self._active += 1
+            reservation.held = True
+
+    def release(self, reservation):
+        with self._cond:
+            self._reserved -= reservation.estimate
+            self._active -= 1
+            reservation.held = False
+            self._cond.notify_all()
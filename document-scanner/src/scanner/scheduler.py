@@ -0,0 +1,209 @@
+import itertools
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from config.settings import INTERACTIVE_CONCURRENCY, BULK_CONCURRENCY
+
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+
+class Cancelled(Exception):
+    """Ein Job wurde abgebrochen (z.B. weil das Dokument abgelehnt wurde)."""
+
+
+class CancelToken:
+    """Kooperativer Abbruch: lange Jobs rufen checkpoint() zwischen den Seiten auf.
+
+    Bei Stapel-Jobs pausiert checkpoint() außerdem, solange interaktive Jobs
+    warten oder laufen, damit diese die CPU bekommen.
+    """
+
+    def __init__(self, priority=BULK):
+        self.priority = priority
+        self.scheduler = None
+        self._event = threading.Event()
+        self._pause_hooks = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+        if self.scheduler is not None:
+            self.scheduler.wake()
+
+    def add_pause_hook(self, suspend, resume):
+        """suspend() läuft, bevor der Job pausiert, resume() bevor er weiterläuft.
+
+        So gibt ein pausierter Job z.B. seine Speicher-Reservation frei, auf die
+        der interaktive Job wartet.
+        """
+        hook = (suspend, resume)
+        self._pause_hooks.append(hook)
+        return hook
+
+    def remove_pause_hook(self, hook):
+        self._pause_hooks.remove(hook)
+
+    def checkpoint(self):
+        if self.cancelled:
+            raise Cancelled()
+        if self.scheduler is not None and self.priority != INTERACTIVE and self.scheduler.should_yield(self):
+            # Hooks run outside the scheduler lock; resume() may block until memory is free again
+            for suspend, _ in self._pause_hooks:
+                suspend()
+            try:
+                self.scheduler.yield_to_interactive(self)
+            finally:
+                for _, resume in reversed(self._pause_hooks):
+                    resume()
+            if self.cancelled:
+                raise Cancelled()
+
+
+class Job:
+    def __init__(self, fn, args, priority, key, token):
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.key = key
+        self.token = token
+        self.future = Future()
+        self.slot = None  # priority class whose slot the running job occupies
+
+
+class PriorityScheduler:
+    """Thread-Pool mit getrennten Warteschlangen und Limits für interaktive und Stapel-Jobs."""
+
+    def __init__(self, limits=None):
+        self.limits = dict(limits or {INTERACTIVE: INTERACTIVE_CONCURRENCY, BULK: BULK_CONCURRENCY})
+        self._queues = {priority: deque() for priority in self.limits}
+        self._running = {priority: 0 for priority in self.limits}
+        self._jobs = {}
+        self._ids = itertools.count()
+        self._cond = threading.Condition()
+        self._workers = []
+        self._shutdown = False
+        with self._cond:
+            self._ensure_workers()
+
+    def _ensure_workers(self):
+        while len(self._workers) < sum(self.limits.values()):
+            worker = threading.Thread(target=self._work, name=f"scheduler-{len(self._workers)}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def submit(self, fn, *args, priority=BULK, key=None, token=None):
+        """Reiht fn(*args, cancel_token=token) ein und gibt den Job zurück (job.future)."""
+        token = token if token is not None else CancelToken(priority)
+        token.scheduler = self
+        token.priority = priority
+        job = Job(fn, args, priority, key if key is not None else next(self._ids), token)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Scheduler wurde beendet")
+            self._queues[priority].append(job)
+            self._jobs[job.key] = job
+            self._cond.notify_all()
+        return job
+
+    def set_limit(self, priority, limit):
+        with self._cond:
+            self.limits[priority] = max(1, int(limit))
+            self._ensure_workers()
+            self._cond.notify_all()
+        logging.info(f"Parallelität {PRIORITY_NAMES.get(priority, priority)}: {self.limits[priority]}")
+
+    def reprioritize(self, key, priority):
+        """Hebt einen wartenden oder laufenden Job in eine andere Klasse."""
+        with self._cond:
+            job = self._jobs.get(key)
+            if job is None:
+                return False
+            job.token.priority = priority
+            if job.slot is None and job.priority != priority:
+                self._queues[job.priority].remove(job)
+                self._queues[priority].append(job)
+            job.priority = priority
+            self._cond.notify_all()
+            return True
+
+    def cancel(self, key):
+        """Bricht einen Job ab: wartende sofort, laufende beim nächsten checkpoint()."""
+        with self._cond:
+            job = self._jobs.get(key)
+            if job is None:
+                return False
+            job.token.cancel()
+            if job.slot is None:
+                self._queues[job.priority].remove(job)
+                del self._jobs[key]
+                job.future.cancel()
+            self._cond.notify_all()
+            return True
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def _interactive_pending(self):
+        return bool(self._queues[INTERACTIVE]) or self._running[INTERACTIVE] > 0
+
+    def _must_yield(self, token):
+        return (not self._shutdown and not token.cancelled
+                and token.priority != INTERACTIVE and self._interactive_pending())
+
+    def should_yield(self, token):
+        with self._cond:
+            return self._must_yield(token)
+
+    def yield_to_interactive(self, token):
+        with self._cond:
+            while self._must_yield(token):
+                self._cond.wait()
+
+    def _take_job(self):
+        for priority in sorted(self._queues):
+            if self._queues[priority] and self._running[priority] < self.limits[priority]:
+                return self._queues[priority].popleft()
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = self._take_job()
+                while job is None:
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                    job = self._take_job()
+                job.slot = job.priority
+                self._running[job.slot] += 1
+
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    if job.token.cancelled:
+                        raise Cancelled()
+                    job.future.set_result(job.fn(*job.args, cancel_token=job.token))
+                except BaseException as e:
+                    job.future.set_exception(e)
+
+            with self._cond:
+                self._running[job.slot] -= 1
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+                self._cond.notify_all()
+
+    def shutdown(self):
+        with self._cond:
+            self._shutdown = True
+            for queue in self._queues.values():
+                while queue:
+                    queue.popleft().future.cancel()
+            self._jobs.clear()
+            self._cond.notify_all()
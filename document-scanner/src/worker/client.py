@@ -0,0 +1,156 @@
+import json
+import socket
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from config.settings import WORKER_SOCKET, WORKER_CONTROL_TIMEOUT
+from scanner.scheduler import Cancelled, PRIORITY_NAMES, INTERACTIVE, BULK
+
+PRIORITIES = {name: priority for priority, name in PRIORITY_NAMES.items()}
+# Threads per request pool: a 'process' request blocks its thread until the document is filed
+POOL_SIZES = {'bulk': 8, 'interactive': 4, 'control': 2}
+
+
+class WorkerError(Exception):
+    """Der Worker-Daemon hat einen Fehler gemeldet."""
+
+
+class WorkerClient:
+    """Verbindung zum Worker-Daemon über den Unix-Socket.
+
+    Bietet dieselben Methoden wie AsyncPipeline bzw. DocumentProcessor, die GUI
+    und Watcher benutzen, so dass beide wahlweise lokal oder über den Daemon laufen.
+
+    Stapel-, interaktive und Steuer-Anfragen laufen in getrennten Thread-Pools,
+    damit Abbrechen und Vorziehen nicht hinter laufenden Dokumenten warten.
+    Noch nicht gesendete Stapel-Dokumente werden lokal abgebrochen bzw. als
+    interaktiv neu gesendet, da der Daemon sie noch nicht kennt.
+    """
+
+    def __init__(self, socket_path=WORKER_SOCKET, timeout=None):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._executors = {}
+        self._queued = {}  # path -> (future returned to the caller, request not finished yet)
+        self._lock = threading.RLock()
+
+    def request(self, command, timeout=None, **params):
+        params['cmd'] = command
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout if timeout is not None else self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall(json.dumps(params).encode('utf-8') + b"\n")
+            with sock.makefile('rb') as stream:
+                line = stream.readline()
+        if not line:
+            raise WorkerError("Keine Antwort vom Worker-Daemon")
+        response = json.loads(line)
+        if response.get('ok'):
+            return response
+        if response.get('error') == 'cancelled':
+            raise Cancelled()
+        raise WorkerError(response.get('error', 'Unbekannter Fehler'))
+
+    def available(self):
+        try:
+            self.request('ping', timeout=0.5)
+            return True
+        except (OSError, ValueError, WorkerError):
+            return False
+
+    def _submit(self, fn, *args, pool='control', **kwargs):
+        with self._lock:
+            executor = self._executors.get(pool)
+            if executor is None:
+                executor = self._executors[pool] = ThreadPoolExecutor(
+                    max_workers=POOL_SIZES[pool], thread_name_prefix=f"worker-client-{pool}")
+            return executor.submit(fn, *args, **kwargs)
+
+    def _process(self, document_path, priority):
+        return self.request('process', path=document_path, priority=PRIORITY_NAMES[priority])['target_path']
+
+    def _send(self, document_path, future, priority):
+        with self._lock:
+            pool = 'interactive' if priority == INTERACTIVE else 'bulk'
+            request = self._submit(self._process, document_path, priority, pool=pool)
+            self._queued[document_path] = (future, request)
+        request.add_done_callback(lambda r: self._finished(document_path, future, r))
+
+    def _finished(self, document_path, future, request):
+        if request.cancelled():
+            return  # taken back before it was sent; cancel/prioritize settle the future
+        with self._lock:
+            if self._queued.get(document_path, (None, None))[1] is request:
+                del self._queued[document_path]
+        if request.exception() is not None:
+            future.set_exception(request.exception())
+        else:
+            future.set_result(request.result())
+
+    def _take_back(self, document_path):
+        """Zieht eine noch nicht gesendete Anfrage zurück; liefert ihr Future oder None."""
+        with self._lock:
+            future, request = self._queued.get(document_path, (None, None))
+            if request is None or not request.cancel():
+                return None
+            del self._queued[document_path]
+            return future
+
+    def analyze(self, document_path):
+        """OCR + Klassifizierung ohne Ablage; liefert Kategorie, Dateiname und Felder."""
+        return self.request('analyze', path=document_path)
+
+    # AsyncPipeline interface
+
+    def submit_threadsafe(self, document_path, priority=BULK):
+        future = Future()
+        self._send(document_path, future, priority)
+        return future
+
+    def learn_threadsafe(self, document_path, category, original_path=None):
+        return self._submit(
+            self.request, 'learn', timeout=WORKER_CONTROL_TIMEOUT,
+            path=document_path, category=category, original_path=original_path)
+
+    def prioritize_threadsafe(self, document_path):
+        with self._lock:
+            future = self._take_back(document_path)
+            if future is not None:
+                self._send(document_path, future, INTERACTIVE)
+                return
+        self._submit(self.request, 'prioritize', timeout=WORKER_CONTROL_TIMEOUT, path=document_path)
+
+    def cancel_threadsafe(self, document_path):
+        future = self._take_back(document_path)
+        if future is not None:
+            future.set_exception(Cancelled())
+            return
+        self._submit(self.request, 'cancel', timeout=WORKER_CONTROL_TIMEOUT, path=document_path)
+
+    def stop_thread(self):
+        with self._lock:
+            executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=False)
+
+    @property
+    def scheduler(self):
+        return RemoteScheduler(self)
+
+
+class RemoteScheduler:
+    """Limits des PriorityScheduler im Daemon lesen und setzen (für den Einstellungsdialog).
+
+    Läuft im GUI-Thread, daher mit begrenztem Zeitlimit statt dem des Clients.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    @property
+    def limits(self):
+        limits = self.client.request('limits', timeout=WORKER_CONTROL_TIMEOUT)['limits']
+        return {PRIORITIES[name]: limit for name, limit in limits.items()}
+
+    def set_limit(self, priority, limit):
+        self.client.request('set_limit', timeout=WORKER_CONTROL_TIMEOUT, priority=PRIORITY_NAMES[priority], limit=limit)
@@ -0,0 +1,159 @@
+"""Langlebiger Worker, der OCR-Engine und Modelle geladen hält.
+
+    python -m worker.daemon          # starten (aus dem src-Ordner)
+    python -m worker.daemon --stop   # laufenden Daemon beenden
+
+GUI, Watcher und scan_file.py verbinden sich automatisch, wenn der Socket erreichbar ist.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+from config.settings import WORKER_SOCKET
+from scanner.scheduler import Cancelled, PRIORITY_NAMES, INTERACTIVE
+from worker.client import WorkerClient, PRIORITIES
+
+
+class WorkerDaemon:
+    def __init__(self, socket_path=WORKER_SOCKET):
+        self.socket_path = socket_path
+        self.processor = None
+        self.pipeline = None
+        self._stopped = None
+
+    async def serve(self):
+        from scanner.document_processor import DocumentProcessor
+        from scanner.async_pipeline import AsyncPipeline
+
+        self._stopped = asyncio.Event()
+        self.processor = DocumentProcessor()
+        self.pipeline = AsyncPipeline(self.processor)
+        await self.pipeline.start()
+
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        logging.info(f"Worker-Daemon lauscht auf {self.socket_path}")
+
+        # Load tesseract and the transformer in the background; early requests simply wait for them
+        warm_up = asyncio.get_running_loop().run_in_executor(None, self._warm_up)
+        try:
+            async with server:
+                await self._stopped.wait()
+        finally:
+            await warm_up
+            await self.pipeline.stop()
+            self.pipeline.scheduler.shutdown()
+            self.processor.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            logging.info("Worker-Daemon beendet")
+
+    def _warm_up(self):
+        try:
+            self.processor.text_extractor.pytesseract
+            self.processor.classifier.nlp
+            logging.info("OCR-Engine und Modelle geladen")
+        except Exception as e:
+            logging.error(f"Fehler beim Vorladen der Modelle: {str(e)}")
+
+    async def _handle(self, reader, writer):
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            try:
+                request = json.loads(line)
+                response = await self._dispatch(request)
+                response['ok'] = True
+            except Cancelled:
+                response = {'ok': False, 'error': 'cancelled'}
+            except Exception as e:
+                logging.error(f"Fehler bei Worker-Anfrage: {str(e)}")
+                response = {'ok': False, 'error': str(e)}
+            writer.write(json.dumps(response).encode('utf-8') + b"\n")
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _run(self, fn, *args, key=None):
+        job = self.pipeline.scheduler.submit(fn, *args, priority=INTERACTIVE, key=key)
+        try:
+            return await asyncio.wrap_future(job.future)
+        except asyncio.CancelledError:
+            if job.future.cancelled():
+                raise Cancelled()
+            raise
+
+    async def _dispatch(self, request):
+        command = request.get('cmd')
+        path = request.get('path')
+
+        if command == 'ping':
+            return {'pid': os.getpid()}
+        if command == 'analyze':
+            text, stats = await self._run(self.processor.extract, path, key=path)
+            category, suggested_filename, fields = await self._run(self.processor.classify, text, key=path)
+            return {
+                'category': category,
+                'filename': suggested_filename,
+                'page_count': stats['page_count'],
+                'fields': fields.as_dict() if fields is not None else {},
+            }
+        if command == 'process':
+            priority = PRIORITIES.get(request.get('priority'), INTERACTIVE)
+            return {'target_path': await self.pipeline.process(path, priority)}
+        if command == 'prioritize':
+            self.pipeline.prioritize(path)
+            return {}
+        if command == 'cancel':
+            self.pipeline.cancel(path)
+            return {}
+        if command == 'learn':
+            # Uses cached text only, so it must not wait behind OCR jobs in the scheduler
+            await self.pipeline.learn_correction(path, request.get('category'), request.get('original_path'))
+            return {}
+        if command == 'limits':
+            return {'limits': {PRIORITY_NAMES[p]: limit for p, limit in self.pipeline.scheduler.limits.items()}}
+        if command == 'set_limit':
+            self.pipeline.scheduler.set_limit(PRIORITIES[request['priority']], request['limit'])
+            return {}
+        if command == 'shutdown':
+            self._stopped.set()
+            return {}
+        raise ValueError(f"Unbekannter Befehl: {command}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker-Daemon für OCR und Klassifizierung")
+    parser.add_argument("--socket", default=WORKER_SOCKET)
+    parser.add_argument("--stop", action="store_true", help="laufenden Daemon beenden")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.stop:
+        client = WorkerClient(args.socket)
+        if not client.available():
+            print("Kein Worker-Daemon aktiv")
+            return 1
+        client.request('shutdown')
+        return 0
+
+    if WorkerClient(args.socket).available():
+        print(f"Worker-Daemon läuft bereits: {args.socket}")
+        return 1
+    try:
+        asyncio.run(WorkerDaemon(args.socket).serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# The application imports its packages relative to src/ (python src/main.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+class FakeProcessor:
+    """Stellt die Pipeline-Stufen von DocumentProcessor nach; OCR ist ein Schlaf je Seite."""
+
+    def __init__(self, output_dir, page_seconds=0.1, pages=1):
+        self.output_dir = output_dir
+        self.page_seconds = page_seconds
+        self.pages = pages
+        self.finished = []
+        self.learned = []
+        self.extract_started = {}
+        self._lock = threading.Lock()
+
+    def extract(self, document_path, cancel_token=None):
+        with self._lock:
+            self.extract_started[document_path] = time.perf_counter()
+        for _ in range(self.pages):
+            if cancel_token is not None:
+                cancel_token.checkpoint()
+            time.sleep(self.page_seconds)
+        return f"text of {document_path}", {'page_count': self.pages}
+
+    def classify(self, text, cancel_token=None):
+        return "Rechnungen", None, None
+
+    def plan_target(self, document_path, category, suggested_filename, reserved=()):
+        return os.path.join(self.output_dir, os.path.basename(document_path))
+
+    def finish_document(self, document_path, target_path, text, category, fields=None, stats=None):
+        with self._lock:
+            self.finished.append(document_path)
+
+    def learn_correction(self, document_path, category, original_path=None):
+        self.learned.append((document_path, category))
+        return True
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def documents(tmp_path):
+    """Erzeugt n leere Scan-Dateien und liefert ihre Pfade."""
+    scan_dir = tmp_path / "scan"
+    scan_dir.mkdir()
+
+    def create(n, prefix="scan"):
+        paths = []
+        for i in range(n):
+            path = scan_dir / f"{prefix}{i}.jpg"
+            path.write_bytes(b"\xff\xd8" + bytes(1024))
+            paths.append(str(path))
+        return paths
+    return create
+
+
+@pytest.fixture
+def fake_processor(tmp_path):
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    return FakeProcessor(str(output_dir))
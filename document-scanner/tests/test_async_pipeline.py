@@ -0,0 +1,133 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from scanner.async_pipeline import AsyncPipeline, DelayedStorage, process_batch
+from scanner.scheduler import Cancelled, BULK
+
+
+def test_downloads_and_moves_overlap_with_ocr(fake_processor, documents):
+    paths = documents(5)
+    fake_processor.page_seconds = 0.3
+    storage = DelayedStorage(read_delay=0.3, move_delay=0.2)
+    sequential = len(paths) * (storage.read_delay + fake_processor.page_seconds + storage.move_delay)
+
+    started = time.perf_counter()
+    results = process_batch(fake_processor, paths, storage=storage)
+    elapsed = time.perf_counter() - started
+
+    assert results == [os.path.join(fake_processor.output_dir, os.path.basename(p)) for p in paths]
+    assert all(os.path.exists(p) for p in results)
+    # Bulk OCR runs one at a time (1.5 s); only the first download and the last move add to that
+    assert elapsed < 0.65 * sequential
+    assert elapsed >= len(paths) * fake_processor.page_seconds
+
+
+def test_failed_document_does_not_stop_the_batch(fake_processor, documents):
+    paths = documents(3)
+    os.remove(paths[1])
+
+    results = process_batch(fake_processor, paths, storage=DelayedStorage(read_delay=0, move_delay=0))
+
+    assert isinstance(results[1], FileNotFoundError)
+    assert [os.path.exists(results[i]) for i in (0, 2)] == [True, True]
+
+
+def _run_pipeline(processor, scenario, storage=None):
+    async def run():
+        pipeline = AsyncPipeline(processor, storage or DelayedStorage(read_delay=0, move_delay=0))
+        await pipeline.start()
+        try:
+            return await scenario(pipeline)
+        finally:
+            await pipeline.stop()
+            pipeline.scheduler.shutdown()
+    return asyncio.run(run())
+
+
+def test_cancel_queued_document_skips_ocr(fake_processor, documents):
+    first, queued = documents(2)
+
+    async def scenario(pipeline):
+        futures = [pipeline.submit(first), pipeline.submit(queued)]
+        pipeline.cancel(queued)
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    results = _run_pipeline(fake_processor, scenario)
+
+    assert isinstance(results[1], Cancelled)
+    assert queued not in fake_processor.extract_started
+    assert os.path.exists(queued) and os.path.exists(results[0])
+
+
+def test_cancel_while_waiting_in_bulk_queue_keeps_workers_alive(fake_processor, documents):
+    fake_processor.page_seconds = 0.2
+    paths = documents(5)
+
+    async def scenario(pipeline):
+        futures = [pipeline.submit(p) for p in paths]
+        # All four workers have submitted their OCR job; three wait for the single bulk slot
+        while len(pipeline.scheduler._jobs) < pipeline.workers:
+            await asyncio.sleep(0.01)
+        queued = [job.key for job in pipeline.scheduler._queues[BULK]]
+        for path in queued:
+            pipeline.cancel(path)
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        return queued, results, [not task.done() for task in pipeline._tasks]
+
+    queued, results, alive = _run_pipeline(fake_processor, scenario)
+
+    assert len(queued) == 3
+    assert all(isinstance(results[paths.index(p)], Cancelled) for p in queued)
+    assert all(alive)
+
+
+def test_cancel_running_document_stops_between_pages(fake_processor, documents):
+    fake_processor.pages, fake_processor.page_seconds = 50, 0.02
+    (path,) = documents(1)
+
+    async def scenario(pipeline):
+        future = pipeline.submit(path)
+        await asyncio.sleep(0.2)
+        pipeline.cancel(path)
+        with pytest.raises(Cancelled):
+            await future
+        return time.perf_counter() - fake_processor.extract_started[path]
+
+    assert _run_pipeline(fake_processor, scenario) < 0.5
+    assert fake_processor.finished == [] and os.path.exists(path)
+
+
+def test_prioritized_document_overtakes_bulk_queue(fake_processor, documents):
+    fake_processor.page_seconds = 0.2
+    paths = documents(4)
+
+    async def scenario(pipeline):
+        futures = [pipeline.submit(p) for p in paths]
+        await asyncio.sleep(0.05)
+        pipeline.prioritize(paths[-1])
+        return await asyncio.gather(*futures)
+
+    _run_pipeline(fake_processor, scenario)
+
+    started = sorted(paths, key=fake_processor.extract_started.get)
+    assert started.index(paths[-1]) <= 1
+
+
+def test_cancel_during_move_does_not_abort_filing(fake_processor, documents):
+    (path,) = documents(1)
+
+    async def scenario(pipeline):
+        future = pipeline.submit(path)
+        while not pipeline._documents[path].filing:
+            await asyncio.sleep(0.01)
+        # A move across volumes shows up as the source being deleted
+        pipeline.cancel(path)
+        return await future
+
+    target = _run_pipeline(fake_processor, scenario, DelayedStorage(read_delay=0, move_delay=0.2))
+
+    assert os.path.exists(target)
+    assert fake_processor.finished == [path]
@@ -0,0 +1,44 @@
+import pytest
+
+from classifier.learned_classifier import LearnedClassifier
+from config.settings import CATEGORIES
+from metadata.store import MetadataStore
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    from scanner.document_processor import DocumentProcessor
+    processor = DocumentProcessor()
+    processor.classifier.learned = LearnedClassifier(model_path=str(tmp_path / "learned.npz"))
+    processor.metadata_store = MetadataStore(str(tmp_path / "metadata"))
+
+    def no_ocr(*args, **kwargs):
+        raise AssertionError("learn_correction must not run OCR")
+
+    monkeypatch.setattr(processor.text_extractor, 'extract_pages', no_ocr)
+    yield processor
+    processor.close()
+
+
+def test_correction_uses_text_from_processing(processor):
+    processor.finish_document("/scan/a.jpg", "/docs/Sonstiges/a.jpg", "Rechnung Betrag", "Sonstiges")
+
+    assert processor.learn_correction("/scan/Rechnung/a.jpg", "Rechnung", "/docs/Sonstiges/a.jpg")
+    assert processor.classifier.learned.n_samples == 1
+    # A second correction of the moved file still finds the text
+    assert processor.learn_correction("/scan/Vertrag/a.jpg", "Vertrag", "/scan/Rechnung/a.jpg")
+
+
+def test_correction_without_cached_text_is_skipped(processor):
+    assert not processor.learn_correction("/scan/Rechnung/b.jpg", "Rechnung", "/scan/b.jpg")
+    assert processor.classifier.learned.n_samples == 0
+
+
+def test_gui_correction_after_filing_learns_a_filing_category(processor):
+    # The GUI list item follows the file to its target; the combo box offers CATEGORIES
+    processor.finish_document("/scan/c.jpg", "/docs/Sonstiges/c.jpg", "Vertrag Laufzeit", "Sonstiges")
+
+    assert processor.learn_correction("/scan/Verträge/c.jpg", CATEGORIES[1], "/docs/Sonstiges/c.jpg")
+    assert processor.classifier.learned.labels == ["Verträge"]
+    assert processor.classifier.categories == CATEGORIES
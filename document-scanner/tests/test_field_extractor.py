@@ -0,0 +1,109 @@
+from datetime import datetime
+
+import pytest
+
+from classifier.field_extractor import FieldExtractor, format_amount
+
+
+@pytest.fixture
+def extractor():
+    return FieldExtractor(today=datetime(2024, 6, 1))
+
+
+@pytest.mark.parametrize("text, amount", [
+    ("Gesamtbetrag: 1.234,56 €", 1234.56),
+    ("Total EUR 1,234.56", 1234.56),
+    ("Zu zahlen: 12.345.678,90 EUR", 12345678.90),
+    ("Betrag 1 234,56 €", 1234.56),
+    ("Summe 1'234.50 Euro", 1234.50),
+    ("Betrag: 99,95 €", 99.95),
+    ("Betrag 1 234,56 €", 1234.56),
+    ("Gesamtbetrag 12 345 678,90 EUR", 12345678.90),
+])
+def test_amount_with_thousands_separators(extractor, text, amount):
+    assert extractor.extract(text).value('amount') == amount
+
+
+@pytest.mark.parametrize("text, date", [
+    ("Rechnungsdatum: 12. März 2024", "12.03.2024"),
+    ("Berlin, 3 Okt. 2023", "03.10.2023"),
+    ("ausgestellt am 1. Dezember 2023", "01.12.2023"),
+    ("Datum: 2024-02-29", "29.02.2024"),
+    ("Datum: 05/04/24", "05.04.2024"),
+])
+def test_dates(extractor, text, date):
+    assert extractor.extract(text).value('date') == date
+
+
+def test_invalid_calendar_date_is_ignored(extractor):
+    assert extractor.extract("Datum: 31.02.2024").value('date') is None
+
+
+def test_iban_checksum(extractor):
+    valid = extractor.extract("IBAN: DE89 3704 0044 0532 0130 00")
+    assert valid.value('iban') == "DE89370400440532013000"
+
+    # Same IBAN with one digit changed fails the mod-97 check
+    assert extractor.extract("IBAN: DE89 3704 0044 0532 0130 01").value('iban') is None
+
+
+def test_total_wins_over_net_and_tax(extractor):
+    text = "Nettobetrag 100,00 €\nMwSt 19 % 19,00 €\nRabatt 150,00 €\nGesamtbetrag 119,00 €"
+    assert extractor.extract(text).value('amount') == 119.00
+
+
+def test_invoice_date_wins_over_birth_and_due_date(extractor):
+    text = ("Geburtsdatum: 01.01.1980\n"
+            "Rechnungsdatum: 15.03.2024\n"
+            "Zahlbar bis 15.04.2024")
+    assert extractor.extract(text).value('date') == "15.03.2024"
+
+
+def test_keyword_only_counts_nearby(extractor):
+    text = "Gesamtbetrag" + " " * 200 + "5,00 € und 7,00 €"
+    best = extractor.extract(text).best('amount')
+    # Too far from the keyword: the larger amount with currency wins
+    assert best.value == 7.00
+
+
+def test_invoice_and_customer_numbers(extractor):
+    fields = extractor.extract("Rechnungsnummer: RE-2024-0815\nKundennr. 4711-22\nRechnung Nr. 2024/001")
+
+    assert fields.value('invoice_number') == "RE-2024-0815"
+    assert fields.value('customer_number') == "4711-22"
+
+
+@pytest.mark.parametrize("text", [
+    "Bitte Rechnungsnummer bei Zahlung angeben. Kundennummer und Datum beachten.",
+    "Rechnungsnr: siehe oben",
+    "Rechnungsnummer: SIEHE OBEN",
+    "Kundennummer: Ihre Angabe",
+    "Rechnungsnummer: Re2024abc",
+])
+def test_words_after_labels_are_not_numbers(extractor, text):
+    fields = extractor.extract(text)
+
+    assert fields.value('invoice_number') is None
+    assert fields.value('customer_number') is None
+
+
+def test_extracted_fields_as_dict(extractor):
+    fields = extractor.extract("Rechnungsdatum 02.05.2024, Gesamtbetrag 10,50 €")
+    fields.set('sender', "Telekom")
+
+    assert fields.as_dict() == {
+        'date': "02.05.2024", 'amount': 10.50, 'iban': None,
+        'invoice_number': None, 'customer_number': None, 'sender': "Telekom",
+    }
+    assert format_amount(fields.value('amount')) == "10,50"
+
+
+def test_space_grouped_amount_is_not_cut_to_its_last_group(extractor):
+    text = "Nettobetrag 1 000,00 €\nMwSt 190,00 €\nGesamtbetrag 1 190,00 €"
+
+    assert extractor.extract(text).value('amount') == 1190.00
+
+
+def test_mixed_group_separators_are_not_one_amount(extractor):
+    # "1.234 567,89" is not a valid grouping; only the well-formed tail counts
+    assert extractor.extract("Summe 1.234 567,89 €").value('amount') == 567.89
@@ -0,0 +1,128 @@
+import os
+
+import pytest
+from PIL import Image, ImageDraw, JpegImagePlugin
+
+from ocr.image_decoder import ImageDecoder, DecodeCache, hamming_distance, raster_bytes
+
+
+def _document(size=(1200, 1600), mode='RGB', seed=1):
+    """Ein Bild mit "Textzeilen", damit JPEG-Kompression und dHash etwas zu tun haben."""
+    img = Image.new(mode, size, 'white')
+    draw = ImageDraw.Draw(img)
+    width, height = size
+    for line, y in enumerate(range(height // 16, height - height // 16, height // 20)):
+        length = (line * 7 * seed + 3 * seed) % 10 + 1
+        draw.rectangle([width // 12, y, width // 12 + length * width // 12, y + height // 50], fill='black')
+    return img
+
+
+@pytest.fixture
+def decoder():
+    return ImageDecoder(max_pixels=200_000, cache=DecodeCache(max_bytes=64 * 1024 * 1024))
+
+
+def test_jpeg_is_decoded_in_draft_mode(tmp_path, decoder, monkeypatch):
+    path = str(tmp_path / "scan.jpg")
+    _document().save(path, 'JPEG')
+    drafted_sizes = []
+    draft = JpegImagePlugin.JpegImageFile.draft
+
+    def spy(img, *args):
+        result = draft(img, *args)
+        drafted_sizes.append(img.size)
+        return result
+
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, 'draft', spy)
+
+    decoded = decoder.decode(path)
+
+    # libjpeg decodes at 1/2 scale right away; only that raster is resized to the budget
+    assert drafted_sizes == [(600, 800)]
+
+    assert decoded.format == 'JPEG'
+    assert decoded.original_size == (1200, 1600)
+    width, height = decoded.image.size
+    assert width * height <= decoder.max_pixels
+    # libjpeg scales by 1/2, 1/4 or 1/8, so the aspect ratio is kept exactly
+    assert width * 1600 == height * 1200
+
+
+def test_exif_orientation_is_applied(tmp_path):
+    path = str(tmp_path / "rotated.jpg")
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90° clockwise
+    _document((400, 300)).save(path, 'JPEG', exif=exif)
+
+    decoded = ImageDecoder(cache=DecodeCache()).decode(path)
+
+    assert decoded.image.size == (300, 400)
+
+
+def test_rgba_is_converted_to_rgb(tmp_path, decoder):
+    path = str(tmp_path / "transparent.png")
+    _document((300, 200), mode='RGBA').save(path, 'PNG')
+
+    decoded = decoder.decode(path)
+
+    assert decoded.image.mode == 'RGB'
+    assert decoded.image.size == (300, 200)
+
+
+def test_cache_hit_until_file_changes(tmp_path, decoder):
+    path = str(tmp_path / "scan.png")
+    _document((300, 200)).save(path, 'PNG')
+
+    first = decoder.decode(path)
+    assert decoder.decode(path) is first
+
+    _document((200, 300)).save(path, 'PNG')
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+    second = decoder.decode(path)
+    assert second is not first
+    assert second.image.size == (200, 300)
+
+
+def test_cache_is_bounded_by_bytes(tmp_path):
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / f"scan{i}.png")
+        _document((300, 200)).save(path, 'PNG')
+        paths.append(path)
+    entry_size = 300 * 200 * 3
+    cache = DecodeCache(max_bytes=2 * entry_size)
+    decoder = ImageDecoder(cache=cache)
+
+    first = decoder.decode(paths[0])
+    decoder.decode(paths[1])
+    decoder.decode(paths[2])
+
+    assert cache.nbytes == 2 * entry_size
+    assert decoder.decode(paths[0]) is not first
+    assert cache.shrink(0) == 2 * entry_size
+    assert cache.nbytes == 0
+
+
+def test_images_larger_than_the_budget_are_not_cached(tmp_path):
+    path = str(tmp_path / "scan.png")
+    _document((300, 200)).save(path, 'PNG')
+    cache = DecodeCache(max_bytes=1000)
+
+    decoded = ImageDecoder(cache=cache).decode(path)
+
+    assert raster_bytes(decoded.image) > 1000
+    assert cache.nbytes == 0
+
+
+def test_perceptual_hash_matches_rescans(tmp_path, decoder):
+    original = _document()
+    paths = {}
+    for name, img in (("a.png", original), ("b.jpg", original.resize((900, 1200))),
+                      ("c.png", _document(seed=4))):
+        paths[name] = str(tmp_path / name)
+        img.save(paths[name])
+
+    hashes = {name: decoder.decode(path).perceptual_hash() for name, path in paths.items()}
+
+    assert hamming_distance(hashes["a.png"], hashes["b.jpg"]) <= 6
+    assert hamming_distance(hashes["a.png"], hashes["c.png"]) > 6
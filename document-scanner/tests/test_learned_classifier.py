@@ -0,0 +1,132 @@
+import os
+import random
+
+import pytest
+
+from classifier import learned_classifier
+from classifier.document_classifier import DocumentClassifier, SENDERS
+from classifier.learned_classifier import LearnedClassifier
+from config.settings import LEARNED_MIN_CONFIDENCE, LEARNED_MIN_SAMPLES
+
+VOCABULARY = {
+    'Rechnungen': "rechnung betrag summe zahlung euro mwst rechnungsnummer gesamtbetrag überweisen fällig".split(),
+    'Verträge': "vertrag vereinbarung laufzeit kündigung vertragspartner unterschrift bedingungen klausel".split(),
+    'Bescheinigungen': "bescheinigung bestätigung nachweis zertifikat hiermit bescheinigt ausgestellt".split(),
+    'Sonstiges': "einladung information newsletter hinweis termin veranstaltung grüße".split(),
+}
+COMMON = "sehr geehrte damen und herren mit freundlichen grüßen straße berlin telefon datum seite".split()
+
+
+def _documents(seed):
+    rng = random.Random(seed)
+
+    def document(category):
+        return " ".join(rng.choices(VOCABULARY[category], k=8) + rng.choices(COMMON, k=15))
+    return document
+
+
+@pytest.fixture
+def model(tmp_path):
+    model = LearnedClassifier(model_path=str(tmp_path / "learned.npz"))
+    yield model
+    model.flush()
+
+
+@pytest.fixture
+def classifier(model):
+    classifier = DocumentClassifier()
+    classifier.learned = model
+    classifier.transformer_calls = []
+
+    def zero_shot(text, candidate_labels):
+        # Stands in for the BART pipeline: counts every call, for categories and senders alike
+        classifier.transformer_calls.append(candidate_labels)
+        return {'labels': list(reversed(candidate_labels))}
+
+    classifier._nlp = zero_shot
+    return classifier
+
+
+def _train(classifier, corrections, seed=0):
+    document = _documents(seed)
+    categories = list(VOCABULARY)
+    for i in range(corrections):
+        category = categories[i % len(categories)]
+        classifier.learn(document(category), category)
+
+
+def test_transformer_is_used_until_enough_corrections(classifier):
+    _train(classifier, LEARNED_MIN_SAMPLES)
+
+    category, filename = classifier.classify(_documents(1)('Rechnungen'))
+
+    # Unsure: the transformer picks the category and, without a known sender in the text, the sender
+    assert classifier.transformer_calls == [classifier.categories, SENDERS]
+    assert category == "Sonstiges"
+    assert SENDERS[-1] in filename
+
+
+def test_documents_skip_the_transformer_after_80_corrections(classifier):
+    _train(classifier, 80)
+    document = _documents(1)
+
+    results = [(category, classifier.classify(document(category))[0])
+               for category in VOCABULARY for _ in range(10)]
+
+    assert classifier.transformer_calls == []
+    assert sum(expected == predicted for expected, predicted in results) == 40
+
+
+def test_confident_documents_name_the_sender_without_the_transformer(classifier):
+    _train(classifier, 80)
+    text = "Telekom Deutschland GmbH\n" + _documents(1)('Rechnungen') + "\nZahlbar per PayPal"
+
+    category, filename = classifier.classify(text)
+
+    assert classifier.transformer_calls == []
+    assert category == "Rechnungen"
+    assert " - Telekom - " in filename
+    assert classifier.detect_sender("Ihre Deutsche Kreditbank AG") == "Deutsche Kreditbank"
+    assert classifier.detect_sender("Wir bedanken uns für Ihren Einkauf") == "Unbekannt"
+
+
+def test_confidence_is_calibrated_on_noisy_corrections(model):
+    # 30 % of the corrections get a random label: confidence must drop instead of staying near 1
+    rng = random.Random(2)
+    document = _documents(3)
+    categories = list(VOCABULARY)
+    for i in range(300):
+        category = categories[i % len(categories)]
+        model.learn(document(category), category if rng.random() > 0.3 else rng.choice(categories))
+
+    confidences = [model.predict(document(category))[1] for category in categories for _ in range(25)]
+
+    mean = sum(confidences) / len(confidences)
+    assert 0.65 < mean < 0.9
+    assert sum(c >= LEARNED_MIN_CONFIDENCE for c in confidences) < len(confidences)
+
+
+def test_saves_are_coalesced_and_reloaded(model, monkeypatch):
+    writes = []
+    save = model._save
+    monkeypatch.setattr(model, '_save', lambda: writes.append(save()))
+    document = _documents(4)
+    for i, category in enumerate(list(VOCABULARY) * 10):
+        model.learn(document(category), category)
+
+    assert writes == []
+    model.flush()
+    assert len(writes) == 1
+
+    reloaded = LearnedClassifier(model_path=model.model_path)
+    text = document('Verträge')
+    assert reloaded.predict(text) == model.predict(text)
+    assert reloaded.temperature == model.temperature
+
+
+def test_save_timer_writes_in_background(model, monkeypatch):
+    monkeypatch.setattr(learned_classifier, 'SAVE_DELAY', 0.05)
+    model.learn("rechnung betrag", "Rechnungen")
+    model._save_timer.join(timeout=2)
+
+    assert os.path.exists(model.model_path)
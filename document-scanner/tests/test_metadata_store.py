@@ -0,0 +1,95 @@
+import csv
+import os
+
+import pytest
+
+from metadata.cli import main
+from metadata.store import COLUMNS, MetadataStore, aggregate
+
+
+def _record(month, sender, amount, category="Rechnungen", name="scan.jpg"):
+    return {'sha256': name, 'month': month, 'sender': sender, 'amount': amount,
+            'category': category, 'page_count': 1, 'source_name': name}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MetadataStore(str(tmp_path / "metadata"))
+    for record in [
+        _record("2024-01", "Telekom", 39.95),
+        _record("2024-01", "Telekom", 10.05),
+        _record("2024-01", "Vodafone", 20.00),
+        _record("2024-01", "Allianz", 120.00, category="Verträge"),
+        _record("2024-02", "Telekom", 39.95),
+        _record("2024-02", "Telekom", None),  # amount not found: counted, but not summed
+    ]:
+        store.append(record)
+    return store
+
+
+def test_aggregate_sums_and_counts_by_sender_and_month(store):
+    rows = aggregate(store.load())
+
+    assert rows == [
+        (("Allianz", "2024-01"), 120.00, 1),
+        (("Telekom", "2024-01"), 50.00, 2),
+        (("Telekom", "2024-02"), 39.95, 2),
+        (("Vodafone", "2024-01"), 20.00, 1),
+    ]
+    assert aggregate(store.load(start="2024-02")) == [(("Telekom", "2024-02"), 39.95, 2)]
+
+
+def test_query_filters_by_category(store, capsys):
+    assert main(["--store", store.base_dir, "query", "--by", "sender", "--category", "Verträge"]) == 0
+
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[0] for line in lines[1:-1]] == ["Allianz"]
+    assert lines[-1] == "Gesamt: 120.00 in 1 Dokumenten"
+
+
+def test_query_rejects_unknown_column(store, capsys):
+    assert main(["--store", store.base_dir, "query", "--by", "absender"]) == 2
+    assert "absender" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_reexport_replaces_only_the_exported_months(store, tmp_path, fmt):
+    pa_dataset = pytest.importorskip("pyarrow.dataset")
+    destination = str(tmp_path / "export")
+    assert store.export(destination, fmt=fmt) == 2
+    january = sorted(os.listdir(os.path.join(destination, "month=2024-01")))
+    january_mtime = os.path.getmtime(os.path.join(destination, "month=2024-01", january[0]))
+
+    store.append(_record("2024-02", "Vodafone", 5.00))
+    assert store.export(destination, fmt=fmt, start="2024-02") == 1
+
+    dataset = pa_dataset.dataset(destination, format='parquet' if fmt == 'parquet' else 'ipc', partitioning='hive')
+    table = dataset.to_table()
+    months = table.column('month').to_pylist()
+    assert (months.count("2024-01"), months.count("2024-02")) == (4, 3)
+    assert sorted(os.listdir(os.path.join(destination, "month=2024-01"))) == january
+    assert os.path.getmtime(os.path.join(destination, "month=2024-01", january[0])) == january_mtime
+
+
+def test_csv_export_migrates_old_partitions(store, tmp_path):
+    # A partition written before the rss columns existed still has peak_rss_mb
+    old_columns = [c for c in COLUMNS if c not in ('rss_delta_mb', 'rss_estimate_mb')] + ['peak_rss_mb']
+    old_path = os.path.join(store.base_dir, "month=2023-12", "records.csv")
+    os.makedirs(os.path.dirname(old_path))
+    with open(old_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=old_columns, restval='')
+        writer.writeheader()
+        writer.writerow({'month': "2023-12", 'sender': "EWE", 'amount': 80.0, 'peak_rss_mb': 812.5})
+
+    destination = str(tmp_path / "export")
+    assert store.export(destination, fmt='csv') == 3
+
+    for month in ("2023-12", "2024-01", "2024-02"):
+        with open(os.path.join(destination, f"month={month}", "records.csv"), newline='', encoding='utf-8') as f:
+            assert next(csv.reader(f)) == COLUMNS
+    exported = MetadataStore(destination).load()
+    assert aggregate(exported, keys=('month',)) == [(("2023-12",), 80.0, 1), (("2024-01",), 190.0, 4),
+                                                    (("2024-02",), 39.95, 2)]
+    # The store's own partition is left as it was
+    with open(old_path, newline='', encoding='utf-8') as f:
+        assert next(csv.reader(f)) == old_columns
@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+
+from scanner.resource_governor import MB, ResourceGovernor, current_rss
+from scanner.scheduler import Cancelled, PriorityScheduler, INTERACTIVE, BULK
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = PriorityScheduler(limits={INTERACTIVE: 1, BULK: 1})
+    yield scheduler
+    scheduler.shutdown()
+
+
+def _governor_for_one_job():
+    """Budget, in das genau eine PDF-Reservation passt (und keine zweite, auch nicht mit MIN_OCR_DPI)."""
+    probe = ResourceGovernor(cache=None)
+    estimate = probe._estimate("a.pdf", probe.dpi)
+    return ResourceGovernor(budget_mb=(current_rss() + 1.5 * estimate) / MB, cache=None)
+
+
+def test_paused_bulk_job_frees_memory_for_interactive_job(scheduler):
+    governor = _governor_for_one_job()
+    bulk_admitted = threading.Event()
+
+    def bulk_job(cancel_token=None):
+        with governor.admit("bulk.pdf", cancel_token) as reservation:
+            bulk_admitted.set()
+            for _ in range(40):
+                cancel_token.checkpoint()
+                time.sleep(0.02)
+            return reservation.held
+
+    def interactive_job(cancel_token=None):
+        with governor.admit("interactive.pdf", cancel_token) as reservation:
+            time.sleep(0.1)
+            return reservation.dpi
+
+    bulk = scheduler.submit(bulk_job, priority=BULK)
+    assert bulk_admitted.wait(timeout=2)
+    interactive = scheduler.submit(interactive_job, priority=INTERACTIVE)
+
+    assert interactive.future.result(timeout=5) == governor.dpi
+    assert bulk.future.result(timeout=5) is True
+    assert governor._active == 0 and governor._reserved == 0
+
+
+def test_cancel_while_waiting_to_resume(scheduler):
+    governor = _governor_for_one_job()
+    bulk_admitted, release = threading.Event(), threading.Event()
+
+    def bulk_job(cancel_token=None):
+        with governor.admit("bulk.pdf", cancel_token):
+            bulk_admitted.set()
+            while True:
+                cancel_token.checkpoint()
+                time.sleep(0.02)
+
+    def interactive_job(cancel_token=None):
+        with governor.admit("interactive.pdf", cancel_token):
+            release.wait(timeout=5)
+
+    bulk = scheduler.submit(bulk_job, priority=BULK, key="bulk")
+    assert bulk_admitted.wait(timeout=2)
+    interactive = scheduler.submit(interactive_job, priority=INTERACTIVE)
+    time.sleep(0.2)
+    scheduler.cancel("bulk")
+
+    with pytest.raises(Cancelled):
+        bulk.future.result(timeout=2)
+    release.set()
+    interactive.future.result(timeout=5)
+    assert governor._active == 0 and governor._reserved == 0
+
+
+def test_reservation_reports_growth_not_process_rss():
+    governor = ResourceGovernor(budget_mb=current_rss() / MB + 4096, cache=None)
+
+    with governor.admit("a.pdf") as reservation:
+        block = bytearray(64 * MB)
+        block[::4096] = b"\x01" * len(block[::4096])
+        reservation.sample()
+        del block
+
+    # The process RSS includes interpreter and libraries; the delta only the block
+    assert 48 <= reservation.rss_delta_mb < reservation.peak_rss / MB
+    assert reservation.estimate_mb == governor._estimate("a.pdf", governor.dpi) / MB
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+from scanner.scheduler import PriorityScheduler, Cancelled, INTERACTIVE, BULK
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = PriorityScheduler(limits={INTERACTIVE: 2, BULK: 1})
+    yield scheduler
+    scheduler.shutdown()
+
+
+def _paged_job(pages, page_seconds, log=None):
+    def job(cancel_token=None):
+        for _ in range(pages):
+            cancel_token.checkpoint()
+            if log is not None:
+                log.append(time.perf_counter())
+            time.sleep(page_seconds)
+        return pages
+    return job
+
+
+def _blocking_job(release, started=None, name=None):
+    def job(cancel_token=None):
+        if started is not None:
+            started.append(name)
+        release.wait(timeout=5)
+        return name
+    return job
+
+
+def test_bulk_job_pauses_while_interactive_job_runs(scheduler):
+    bulk_pages = []
+    bulk = scheduler.submit(_paged_job(20, 0.02, bulk_pages), priority=BULK)
+    time.sleep(0.1)
+
+    window = {}
+
+    def interactive_job(cancel_token=None):
+        window['start'] = time.perf_counter()
+        time.sleep(0.3)
+        window['end'] = time.perf_counter()
+
+    scheduler.submit(interactive_job, priority=INTERACTIVE).future.result(timeout=5)
+
+    assert bulk.future.result(timeout=5) == 20
+    # At most the page that was already running when the interactive job arrived
+    during = [t for t in bulk_pages if window['start'] + 0.03 < t < window['end']]
+    assert during == []
+
+
+def test_prioritized_job_overtakes_bulk_queue(scheduler):
+    release, done, started = threading.Event(), threading.Event(), []
+    done.set()
+    jobs = {name: scheduler.submit(_blocking_job(event, started, name), priority=BULK, key=name)
+            for name, event in (("a", release), ("b", release), ("c", done))}
+    time.sleep(0.05)
+
+    assert scheduler.reprioritize("c", INTERACTIVE)
+    jobs["c"].future.result(timeout=1)  # runs in an interactive slot while "a" still blocks the bulk slot
+    release.set()
+
+    assert [jobs[name].future.result(timeout=5) for name in "abc"] == ["a", "b", "c"]
+    assert started == ["a", "c", "b"]
+
+
+def test_cancel_queued_job_never_runs(scheduler):
+    release, started = threading.Event(), []
+    scheduler.submit(_blocking_job(release, started, "a"), priority=BULK, key="a")
+    queued = scheduler.submit(_blocking_job(release, started, "b"), priority=BULK, key="b")
+
+    assert scheduler.cancel("b")
+    release.set()
+
+    assert queued.future.cancelled()
+    time.sleep(0.1)
+    assert started == ["a"]
+    assert not scheduler.cancel("b")
+
+
+def test_cancel_running_job_stops_at_next_checkpoint(scheduler):
+    pages = []
+    job = scheduler.submit(_paged_job(100, 0.02, pages), priority=BULK, key="doc")
+    time.sleep(0.1)
+
+    scheduler.cancel("doc")
+
+    with pytest.raises(Cancelled):
+        job.future.result(timeout=2)
+    assert len(pages) < 100
+
+
+def test_set_limit_allows_more_parallel_jobs(scheduler):
+    barrier = threading.Barrier(2, timeout=2)
+
+    def job(cancel_token=None):
+        barrier.wait()
+        return True
+
+    first = scheduler.submit(job, priority=BULK)
+    second = scheduler.submit(job, priority=BULK)
+    time.sleep(0.1)
+    assert not first.future.done()  # only one bulk slot: the barrier cannot be passed yet
+
+    scheduler.set_limit(BULK, 2)
+
+    assert first.future.result(timeout=3) and second.future.result(timeout=3)
+    assert scheduler.limits[BULK] == 2
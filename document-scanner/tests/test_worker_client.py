@@ -0,0 +1,145 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+import worker.client
+from scanner.scheduler import BULK, Cancelled
+from worker.client import WorkerClient
+
+
+@pytest.fixture
+def silent_daemon(tmp_path):
+    """Ein Socket, der Verbindungen annimmt, aber nie antwortet (z.B. hängender Daemon)."""
+    path = str(tmp_path / "worker.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    connections = []
+
+    def accept():
+        while True:
+            try:
+                connections.append(server.accept()[0])
+            except OSError:
+                return
+    threading.Thread(target=accept, daemon=True).start()
+    yield path
+    server.close()
+    for connection in connections:
+        connection.close()
+
+
+@pytest.fixture
+def slow_daemon(tmp_path):
+    """Beantwortet 'process' erst nach `delay` Sekunden, Steuerbefehle sofort; protokolliert die Ankunft."""
+    path = str(tmp_path / "worker.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(64)
+    daemon = type("SlowDaemon", (), {'path': path, 'delay': 1.0, 'log': [], 'started': time.perf_counter()})()
+
+    def handle(connection):
+        with connection, connection.makefile('rb') as stream:
+            request = json.loads(stream.readline())
+            daemon.log.append((time.perf_counter() - daemon.started, request['cmd'], request.get('path'),
+                               request.get('priority')))
+            response = {'ok': True}
+            if request['cmd'] == 'process':
+                time.sleep(daemon.delay)
+                response['target_path'] = "/docs/" + request['path']
+            connection.sendall(json.dumps(response).encode('utf-8') + b"\n")
+
+    def accept():
+        while True:
+            try:
+                connection = server.accept()[0]
+            except OSError:
+                return
+            threading.Thread(target=handle, args=(connection,), daemon=True).start()
+    threading.Thread(target=accept, daemon=True).start()
+    yield daemon
+    server.close()
+
+
+def test_control_commands_do_not_wait_behind_documents(slow_daemon):
+    client = WorkerClient(slow_daemon.path)
+    futures = {f"doc{i}": client.submit_threadsafe(f"doc{i}") for i in range(12)}
+    time.sleep(0.1)
+
+    client.cancel_threadsafe("doc1")       # already at the daemon
+    client.cancel_threadsafe("doc10")      # still waiting in the client: never sent
+    client.prioritize_threadsafe("doc11")  # still waiting in the client: sent right away as interactive
+    time.sleep(0.3)
+
+    arrivals = {(cmd, path): (t, priority) for t, cmd, path, priority in slow_daemon.log}
+    assert arrivals[('cancel', "doc1")][0] < 0.5
+    assert arrivals[('process', "doc11")][0] < 0.5
+    assert arrivals[('process', "doc11")][1] == "interactive"
+    assert ('process', "doc10") not in arrivals
+    with pytest.raises(Cancelled):
+        futures["doc10"].result(timeout=0)
+
+    assert futures["doc11"].result(timeout=2) == "/docs/doc11"
+    assert futures["doc9"].result(timeout=3) == "/docs/doc9"
+    assert ('process', "doc10") not in {(cmd, path) for _, cmd, path, _ in slow_daemon.log}
+    client.stop_thread()
+
+
+def test_control_commands_time_out_instead_of_blocking(silent_daemon, monkeypatch):
+    monkeypatch.setattr(worker.client, 'WORKER_CONTROL_TIMEOUT', 0.2)
+    client = WorkerClient(silent_daemon)  # no timeout for process requests
+
+    started = time.perf_counter()
+    with pytest.raises(socket.timeout):
+        client.scheduler.limits
+    with pytest.raises(socket.timeout):
+        client.scheduler.set_limit(BULK, 2)
+    with pytest.raises(socket.timeout):
+        client.learn_threadsafe("/scan/a.jpg", "Rechnung").result(timeout=2)
+
+    assert time.perf_counter() - started < 2
+    client.stop_thread()
+
+
+def test_learn_returns_immediately(silent_daemon, monkeypatch):
+    monkeypatch.setattr(worker.client, 'WORKER_CONTROL_TIMEOUT', 0.5)
+    client = WorkerClient(silent_daemon)
+
+    started = time.perf_counter()
+    future = client.learn_threadsafe("/scan/a.jpg", "Rechnung", "/docs/Sonstiges/a.jpg")
+
+    assert time.perf_counter() - started < 0.1
+    assert not hasattr(client, 'learn_correction')
+    with pytest.raises(socket.timeout):
+        future.result(timeout=2)
+    client.stop_thread()
+
+
+def test_daemon_learns_while_ocr_slots_are_busy(fake_processor):
+    from scanner.async_pipeline import AsyncPipeline
+    from scanner.scheduler import PriorityScheduler, INTERACTIVE
+    from worker.daemon import WorkerDaemon
+
+    async def run():
+        scheduler = PriorityScheduler(limits={INTERACTIVE: 1, BULK: 1})
+        release = threading.Event()
+        busy = scheduler.submit(lambda cancel_token=None: release.wait(5), priority=INTERACTIVE)
+        daemon = WorkerDaemon()
+        daemon.processor = fake_processor
+        daemon.pipeline = AsyncPipeline(fake_processor, scheduler=scheduler)
+        await daemon.pipeline.start()
+        try:
+            return await asyncio.wait_for(
+                daemon._dispatch({'cmd': 'learn', 'path': "/scan/a.jpg", 'category': "Rechnung"}), 1)
+        finally:
+            release.set()
+            busy.future.result(timeout=5)
+            await daemon.pipeline.stop()
+            scheduler.shutdown()
+
+    assert asyncio.run(run()) == {}
+    assert fake_processor.learned == [("/scan/a.jpg", "Rechnung")]